@@ -31,7 +31,7 @@ def admin_action_logged(action_name):
             current_user = kwargs.get('current_user')
             if current_user and isinstance(result, tuple) and result[1] == 200:
                 # Extract target_id from kwargs or args
-                target_id = kwargs.get('user_id') or kwargs.get('report_id')
+                target_id = kwargs.get('user_id') or kwargs.get('report_id') or kwargs.get('message_id')
                 log_admin_action(
                     str(current_user['_id']),
                     action_name,
@@ -1,8 +1,10 @@
 """Authentication middleware and decorators."""
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from bson import ObjectId
+from flask import jsonify, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
 from ..models.user import User
+from ..services.revocation import RevocationFeed
 
 
 def jwt_required_custom(fn):
@@ -30,6 +32,47 @@ def jwt_required_custom(fn):
     return wrapper
 
 
+def jwt_claims_required(fn):
+    """
+    JWT required decorator that authenticates from token claims when possible.
+
+    With JWT_STATELESS_AUTH enabled and a token carrying the user snapshot
+    claim, current_user is built from the claims (_id, pseudonym, roles,
+    is_admin, is_active) and checked against the in-memory revocation mirror,
+    so no database read is needed. Use only on routes that need nothing
+    beyond those fields; otherwise behaves like jwt_required_custom.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not current_app.config['JWT_STATELESS_AUTH']:
+            return jwt_required_custom(fn)(*args, **kwargs)
+
+        try:
+            verify_jwt_in_request()
+            user_id = get_jwt_identity()
+            snapshot = get_jwt().get('user')
+        except Exception as e:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+
+        if not snapshot:
+            # Token issued before stateless mode; load the user instead
+            return jwt_required_custom(fn)(*args, **kwargs)
+
+        if not snapshot.get('is_active', True) or RevocationFeed.is_revoked(user_id):
+            return jsonify({'error': 'Account is inactive'}), 403
+
+        kwargs['current_user'] = {
+            '_id': ObjectId(user_id),
+            'pseudonym': snapshot['pseudonym'],
+            'roles': snapshot['roles'],
+            'is_admin': snapshot['is_admin'],
+            'is_active': snapshot['is_active']
+        }
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
 def role_required(*required_roles):
     """Decorator to check if user has required role."""
     def decorator(fn):
@@ -0,0 +1,143 @@
+"""JWT blocklist enforcement with an in-process bloom filter front."""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from ..extensions import jwt, redis_client, socketio
+from ..services.metrics import Metrics
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class TokenBlocklist:
+    """Revoked token IDs (jti) stored in Redis and mirrored in a local bloom filter.
+
+    A token whose jti is not in the bloom filter is not revoked, which answers
+    the common case without a network round trip. Bloom hits are confirmed
+    against Redis (and remembered in a small LRU). New revocations arrive
+    through pub/sub; the filter is rebuilt periodically from Redis so
+    expired entries drop out.
+    """
+
+    PREFIX = 'blacklist:'
+    CHANNEL = 'blacklist:feed'
+    LRU_SIZE = 10000
+
+    _bloom = None
+    _confirmed = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def revoke(jti, ttl):
+        """Revoke a token ID for ttl seconds on every worker."""
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(f'{TokenBlocklist.PREFIX}{jti}', ttl, 'true')
+        pipe.publish(TokenBlocklist.CHANNEL, f'{jti}|{time.time()}')
+        pipe.execute()
+        TokenBlocklist._add_local(jti)
+
+    @staticmethod
+    def is_revoked(jti):
+        """Check if a token ID is revoked."""
+        bloom = TokenBlocklist._bloom
+        if bloom is not None and jti not in bloom:
+            Metrics.incr('blocklist.fast_negative')
+            return False
+
+        with TokenBlocklist._lock:
+            if jti in TokenBlocklist._confirmed:
+                TokenBlocklist._confirmed.move_to_end(jti)
+                return TokenBlocklist._confirmed[jti]
+
+        revoked = bool(redis_client.exists(f'{TokenBlocklist.PREFIX}{jti}'))
+        if bloom is not None:
+            Metrics.incr('blocklist.confirmed' if revoked else 'blocklist.false_positive')
+
+        with TokenBlocklist._lock:
+            TokenBlocklist._confirmed[jti] = revoked
+            if len(TokenBlocklist._confirmed) > TokenBlocklist.LRU_SIZE:
+                TokenBlocklist._confirmed.popitem(last=False)
+
+        return revoked
+
+    @staticmethod
+    def _add_local(jti):
+        with TokenBlocklist._lock:
+            if TokenBlocklist._bloom is not None:
+                TokenBlocklist._bloom.add(jti)
+            TokenBlocklist._confirmed[jti] = True
+
+    @staticmethod
+    def rebuild(capacity):
+        """Rebuild the bloom filter from the revoked keys currently in Redis."""
+        bloom = BloomFilter(capacity)
+        count = 0
+        for key in redis_client.scan_iter(match=f'{TokenBlocklist.PREFIX}*', count=1000):
+            bloom.add(key[len(TokenBlocklist.PREFIX):])
+            count += 1
+
+        with TokenBlocklist._lock:
+            TokenBlocklist._bloom = bloom
+            # Drop cached answers: some may be for tokens that have expired since
+            TokenBlocklist._confirmed.clear()
+
+        Metrics.gauge('blocklist.size', count)
+        return count
+
+    @staticmethod
+    def start_sync(app):
+        """Build the filter and follow new revocations in the background."""
+        capacity = app.config['BLOCKLIST_BLOOM_CAPACITY']
+        rebuild_seconds = app.config['BLOCKLIST_REBUILD_SECONDS']
+
+        def sync():
+            while True:
+                try:
+                    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(TokenBlocklist.CHANNEL)
+                    TokenBlocklist.rebuild(capacity)
+                    rebuilt_at = time.time()
+
+                    while True:
+                        message = pubsub.get_message(timeout=1.0)
+                        if message:
+                            jti, published_at = message['data'].rsplit('|', 1)
+                            TokenBlocklist._add_local(jti)
+                            Metrics.observe('blocklist.sync_lag_ms', (time.time() - float(published_at)) * 1000)
+                        if time.time() - rebuilt_at >= rebuild_seconds:
+                            TokenBlocklist.rebuild(capacity)
+                            rebuilt_at = time.time()
+                except Exception as e:
+                    # Without a trustworthy filter every check goes to Redis
+                    TokenBlocklist._bloom = None
+                    app.logger.error(f'Blocklist sync error: {str(e)}')
+                    socketio.sleep(1)
+
+        socketio.start_background_task(sync)
+
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    """Reject tokens revoked at logout."""
+    return TokenBlocklist.is_revoked(jwt_payload['jti'])
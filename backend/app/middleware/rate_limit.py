@@ -0,0 +1,226 @@
+"""Sliding-window rate limiting for REST routes and Socket.IO events."""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import request, jsonify, current_app
+from flask_socketio import emit
+from ..extensions import redis_client
+from ..services.metrics import Metrics
+from ..sockets.session_state import SocketIdentity
+
+
+# KEYS[1] = window key; ARGV = now_ms, window_ms, limit, member
+# Returns {allowed, remaining, retry_after_ms}
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('PEXPIRE', key, window)
+    return {1, limit - count - 1, 0}
+end
+
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+local retry_after = window
+if oldest[2] then
+    retry_after = tonumber(oldest[2]) + window - now
+end
+return {0, 0, retry_after}
+"""
+
+
+class RateLimiter:
+    """Per-rule, per-client request limits enforced in Redis.
+
+    Each rule ('auth', 'messages', 'api') allows `limit` requests per
+    `window` seconds, counted in a Redis sorted set per client by an atomic
+    Lua script, so every worker shares the same window.
+
+    Before going to Redis each worker runs two local checks. A token bucket
+    per client (capacity = limit, refilled at limit/window) denies clients
+    that have already used up the rule on this worker alone, and a client
+    Redis has denied stays denied locally until its retry-after passes.
+    An abusive client is therefore rejected in memory instead of costing a
+    Redis round trip per request. Both local maps are LRUs capped at
+    LOCAL_MAX_KEYS. If Redis is unavailable requests are let through rather
+    than failing the whole API.
+
+    Clients are keyed by request.remote_addr; behind reverse proxies set
+    PROXY_FIX_X_FOR so it comes from the trusted X-Forwarded-For hop.
+    """
+
+    PREFIX = 'rate_limit:'
+    LOCAL_MAX_KEYS = 50000
+
+    _script = None
+    _buckets = OrderedDict()       # (rule, client) -> [tokens, updated_at]
+    _denied_until = OrderedDict()  # (rule, client) -> time
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_rule(rule):
+        """
+        Get the configured limit for a rule.
+
+        Returns:
+            (limit, window_seconds)
+        """
+        return current_app.config['RATE_LIMITS'][rule]
+
+    @staticmethod
+    def hit(rule, client):
+        """
+        Count one request for a client against a rule.
+
+        Args:
+            rule: Rule name from RATE_LIMITS
+            client: Client key (user ID or IP address)
+
+        Returns:
+            (allowed, retry_after_seconds)
+        """
+        limit, window = RateLimiter.get_rule(rule)
+        local_key = (rule, client)
+        now = time.time()
+
+        with RateLimiter._lock:
+            if RateLimiter._denied_until.get(local_key, 0) > now:
+                Metrics.incr(f'rate_limit.{rule}.local_denied')
+                return False, RateLimiter._denied_until[local_key] - now
+
+            if not RateLimiter._take_local_token(local_key, limit, window, now):
+                Metrics.incr(f'rate_limit.{rule}.local_denied')
+                return False, window / limit
+
+        try:
+            if RateLimiter._script is None:
+                RateLimiter._script = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+
+            allowed, remaining, retry_after_ms = RateLimiter._script(
+                keys=[f'{RateLimiter.PREFIX}{rule}:{client}'],
+                args=[int(now * 1000), int(window * 1000), limit, f'{now}:{uuid.uuid4().hex[:8]}']
+            )
+        except Exception as e:
+            current_app.logger.error(f'Rate limiter unavailable: {str(e)}')
+            Metrics.incr(f'rate_limit.{rule}.error')
+            return True, 0
+
+        if allowed:
+            Metrics.incr(f'rate_limit.{rule}.allowed')
+            return True, 0
+
+        retry_after = retry_after_ms / 1000.0
+        with RateLimiter._lock:
+            RateLimiter._denied_until[local_key] = now + retry_after
+            RateLimiter._denied_until.move_to_end(local_key)
+            if len(RateLimiter._denied_until) > RateLimiter.LOCAL_MAX_KEYS:
+                RateLimiter._denied_until.popitem(last=False)
+
+        Metrics.incr(f'rate_limit.{rule}.denied')
+        return False, retry_after
+
+    @staticmethod
+    def _take_local_token(local_key, limit, window, now):
+        """Take a token from this worker's bucket for the client (lock held)."""
+        bucket = RateLimiter._buckets.get(local_key)
+        if bucket is None:
+            if len(RateLimiter._buckets) >= RateLimiter.LOCAL_MAX_KEYS:
+                RateLimiter._buckets.popitem(last=False)
+            bucket = RateLimiter._buckets[local_key] = [float(limit), now]
+        else:
+            RateLimiter._buckets.move_to_end(local_key)
+
+        tokens = min(limit, bucket[0] + (now - bucket[1]) * limit / window)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+
+        bucket[0] = tokens - 1
+        return True
+
+    @staticmethod
+    def client_ip():
+        """Get the client address (resolved by ProxyFix behind proxies)."""
+        return request.remote_addr or 'unknown'
+
+    @staticmethod
+    def too_many_requests(retry_after):
+        """Build the 429 response."""
+        response = jsonify({'error': 'Too many requests, please slow down'})
+        response.headers['Retry-After'] = str(max(int(retry_after + 0.999), 1))
+        return response, 429
+
+    @staticmethod
+    def init_app(app):
+        """Apply the 'api' rule to every /api/v1 request."""
+        @app.before_request
+        def limit_api_requests():
+            if not app.config['RATE_LIMIT_ENABLED'] or not request.path.startswith('/api/v1/'):
+                return None
+
+            allowed, retry_after = RateLimiter.hit('api', RateLimiter.client_ip())
+            if not allowed:
+                return RateLimiter.too_many_requests(retry_after)
+            return None
+
+
+def rate_limited(rule, key_func=None):
+    """
+    Decorator to rate limit a Flask route.
+
+    Args:
+        rule: Rule name from RATE_LIMITS
+        key_func: Returns the client key; defaults to the client IP
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not current_app.config['RATE_LIMIT_ENABLED']:
+                return fn(*args, **kwargs)
+
+            client = key_func() if key_func else RateLimiter.client_ip()
+            allowed, retry_after = RateLimiter.hit(rule, client)
+            if not allowed:
+                return RateLimiter.too_many_requests(retry_after)
+
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def socket_rate_limited(rule):
+    """
+    Decorator to rate limit a Socket.IO event handler per authenticated user.
+
+    Must be applied below @socketio.on. Over the limit the client gets an
+    'error' event with retry_after and the handler is skipped.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not current_app.config['RATE_LIMIT_ENABLED']:
+                return fn(*args, **kwargs)
+
+            identity = SocketIdentity.current()
+            client = identity['user_id'] if identity else request.sid
+
+            allowed, retry_after = RateLimiter.hit(rule, client)
+            if not allowed:
+                emit('error', {
+                    'message': 'Rate limit exceeded, please slow down',
+                    'retry_after': round(retry_after, 1)
+                })
+                return None
+
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
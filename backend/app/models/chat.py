@@ -1,7 +1,9 @@
 """Chat session model."""
 from datetime import datetime, timedelta
 from bson import ObjectId
-from ..extensions import db
+from redis.exceptions import RedisError
+from ..extensions import db, redis_client
+from ..services.message_cache import RecentMessageCache
 
 
 class ChatSession:
@@ -9,6 +11,13 @@ class ChatSession:
 
     collection = db.chat_sessions
 
+    # Recent partners are cached per user as a sorted set (partner ID -> start
+    # timestamp). The sentinel member marks a set rebuilt from MongoDB, so a
+    # key that only holds entries written by create() is treated as a miss.
+    RECENT_PARTNERS_KEY = 'recent_partners:{}'
+    RECENT_PARTNERS_LOADED = '__loaded__'
+    RECENT_PARTNERS_HOURS = 24
+
     @staticmethod
     def create(sharer_id, listener_id, topic=None, language=None):
         """Create a new chat session."""
@@ -31,8 +40,35 @@ class ChatSession:
 
         result = ChatSession.collection.insert_one(session_doc)
         session_doc['_id'] = result.inserted_id
+
+        ChatSession._cache_partners(sharer_id, listener_id, session_doc['started_at'])
+        RecentMessageCache.init_session(session_doc['_id'])
+
         return session_doc
 
+    @staticmethod
+    def _cache_partners(sharer_id, listener_id, started_at):
+        """Record both directions of a new pairing in the recent partner cache."""
+        timestamp = started_at.timestamp()
+        ttl = ChatSession.RECENT_PARTNERS_HOURS * 3600
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for user_id, partner_id in ((sharer_id, listener_id), (listener_id, sharer_id)):
+                key = ChatSession.RECENT_PARTNERS_KEY.format(user_id)
+                pipe.zadd(key, {str(partner_id): timestamp})
+                pipe.expire(key, ttl)
+            pipe.execute()
+        except RedisError:
+            # Drop both sets so the next read rebuilds them from MongoDB
+            try:
+                redis_client.delete(
+                    ChatSession.RECENT_PARTNERS_KEY.format(sharer_id),
+                    ChatSession.RECENT_PARTNERS_KEY.format(listener_id)
+                )
+            except RedisError:
+                pass
+
     @staticmethod
     def find_by_id(session_id):
         """Find chat session by ID."""
@@ -76,6 +112,8 @@ class ChatSession:
             }}
         )
 
+        RecentMessageCache.clear(session_id)
+
         return {
             'session_id': str(session_id),
             'duration_minutes': int(duration)
@@ -83,27 +121,76 @@ class ChatSession:
 
     @staticmethod
     def get_recent_partners(user_id, hours=24):
-        """Get list of users this user chatted with in last N hours."""
+        """
+        Get set of users this user chatted with in last N hours.
+
+        Served from the Redis partner cache; on a cache miss the set is
+        rebuilt from MongoDB.
+        """
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
 
         cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        sessions = ChatSession.collection.find({
-            '$or': [
-                {'sharer_id': user_id},
-                {'listener_id': user_id}
-            ],
-            'started_at': {'$gte': cutoff_time}
-        })
 
-        partner_ids = set()
+        if hours > ChatSession.RECENT_PARTNERS_HOURS:
+            return set(ChatSession._load_recent_partners(user_id, cutoff_time))
+
+        key = ChatSession.RECENT_PARTNERS_KEY.format(user_id)
+        cache_cutoff = datetime.utcnow() - timedelta(hours=ChatSession.RECENT_PARTNERS_HOURS)
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.zremrangebyscore(key, '-inf', f'({cache_cutoff.timestamp()}')
+            pipe.zscore(key, ChatSession.RECENT_PARTNERS_LOADED)
+            pipe.zrangebyscore(key, cutoff_time.timestamp(), '+inf')
+            _, loaded, members = pipe.execute()
+
+            if loaded is not None:
+                return {
+                    ObjectId(member) for member in members
+                    if member != ChatSession.RECENT_PARTNERS_LOADED
+                }
+        except RedisError:
+            return set(ChatSession._load_recent_partners(user_id, cutoff_time))
+
+        # Cache miss: rebuild the full cache window from MongoDB
+        partners = ChatSession._load_recent_partners(user_id, cache_cutoff)
+        try:
+            mapping = {str(partner_id): started_at.timestamp() for partner_id, started_at in partners.items()}
+            mapping[ChatSession.RECENT_PARTNERS_LOADED] = float('inf')
+
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.zadd(key, mapping)
+            pipe.expire(key, ChatSession.RECENT_PARTNERS_HOURS * 3600)
+            pipe.execute()
+        except RedisError:
+            pass
+
+        return {partner_id for partner_id, started_at in partners.items() if started_at >= cutoff_time}
+
+    @staticmethod
+    def _load_recent_partners(user_id, cutoff_time):
+        """Query MongoDB for partners since cutoff_time, mapped to the latest session start."""
+        sessions = ChatSession.collection.find(
+            {
+                '$or': [
+                    {'sharer_id': user_id},
+                    {'listener_id': user_id}
+                ],
+                'started_at': {'$gte': cutoff_time}
+            },
+            {'sharer_id': 1, 'listener_id': 1, 'started_at': 1}
+        )
+
+        partners = {}
         for session in sessions:
             if session['sharer_id'] == user_id:
-                partner_ids.add(session['listener_id'])
+                partner_id = session['listener_id']
             else:
-                partner_ids.add(session['sharer_id'])
+                partner_id = session['sharer_id']
+            partners[partner_id] = max(partners.get(partner_id, session['started_at']), session['started_at'])
 
-        return list(partner_ids)
+        return partners
 
     @staticmethod
     def to_dict(session_doc):
@@ -1,41 +1,222 @@
 """Message model."""
 from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from ..extensions import db
 
 
 class Message:
-    """Chat message model."""
+    """Chat message model.
+
+    Messages are stored either one document per message in `messages`, or,
+    with MESSAGE_STORAGE_MODE=buckets, appended into per-session bucket
+    documents in `message_buckets` holding up to bucket_size messages each
+    (one _id/TTL index entry per bucket instead of per message). A bucket
+    only takes messages that expire within bucket_window of its oldest
+    one, so the TTL index deletes it at most that long after its first
+    message expires, and reads skip messages older than TTL meanwhile.
+    Flagged messages are always kept as individual documents so moderation
+    queries can index them. In bucket mode reads merge both collections,
+    which also covers messages stored before the switch.
+    """
 
     collection = db.messages
+    bucket_collection = db.message_buckets
+
+    # Messages are deleted this long after they are sent
+    TTL = timedelta(hours=24)
+
+    # 0 = one document per message
+    bucket_size = 0
+    bucket_window = timedelta(minutes=10)
+
+    # Fields returned by chat history
+    HISTORY_PROJECTION = {'sender_id': 1, 'sender_role': 1, 'content': 1, 'sent_at': 1}
+
+    # Fields kept for each message inside a bucket
+    BUCKET_FIELDS = ('_id', 'sender_id', 'sender_role', 'content', 'sent_at', 'moderation_status')
 
     @staticmethod
-    def create(chat_session_id, sender_id, sender_role, content, moderation_status='approved'):
-        """Create a new message."""
+    def configure_storage(app):
+        """Select the storage layout from MESSAGE_STORAGE_MODE."""
+        if app.config['MESSAGE_STORAGE_MODE'] == 'buckets':
+            Message.bucket_size = app.config['MESSAGE_BUCKET_SIZE']
+            Message.bucket_window = timedelta(seconds=app.config['MESSAGE_BUCKET_WINDOW_SECONDS'])
+        else:
+            Message.bucket_size = 0
+
+    @staticmethod
+    def build(chat_session_id, sender_id, sender_role, content, moderation_status='approved'):
+        """Build a message document (with its _id) without storing it."""
         if isinstance(chat_session_id, str):
             chat_session_id = ObjectId(chat_session_id)
         if isinstance(sender_id, str):
             sender_id = ObjectId(sender_id)
 
-        message_doc = {
+        return {
+            '_id': ObjectId(),
             'chat_session_id': chat_session_id,
             'sender_id': sender_id,
             'sender_role': sender_role,
             'content': content,
             'sent_at': datetime.utcnow(),
-            'expires_at': datetime.utcnow() + timedelta(hours=24),
+            'expires_at': datetime.utcnow() + Message.TTL,
             'is_flagged': moderation_status == 'flagged',
             'moderation_status': moderation_status,
             'flagged_reason': None
         }
 
-        result = Message.collection.insert_one(message_doc)
-        message_doc['_id'] = result.inserted_id
+    @staticmethod
+    def create(chat_session_id, sender_id, sender_role, content, moderation_status='approved'):
+        """Create a new message."""
+        message_doc = Message.build(chat_session_id, sender_id, sender_role, content, moderation_status)
+        if Message.bucket_size:
+            Message.save_many([message_doc])
+        else:
+            Message.collection.insert_one(message_doc)
         return message_doc
 
+    @staticmethod
+    def save_many(message_docs):
+        """
+        Store messages built with Message.build in the configured layout.
+
+        In document mode this is an unordered insert_many (BulkWriteError
+        indexes refer to message_docs). In bucket mode the messages are
+        appended to their sessions' open buckets in one ordered bulk write.
+        Messages that are already stored (a retry or journal replay) are
+        skipped: duplicate flagged inserts are ignored and messages already
+        in a bucket are not appended again.
+        """
+        if not Message.bucket_size:
+            Message.collection.insert_many(message_docs, ordered=False)
+            return
+
+        flagged_error = None
+        flagged = [doc for doc in message_docs if doc['is_flagged']]
+        if flagged:
+            try:
+                Message.collection.insert_many(flagged, ordered=False)
+            except BulkWriteError as e:
+                if any(error['code'] != 11000 for error in e.details['writeErrors']):
+                    flagged_error = e
+
+        # Retries and journal replays resend messages; skip those already appended
+        unflagged = [doc for doc in message_docs if not doc['is_flagged']]
+        stored = Message._stored_in_buckets(unflagged)
+        operations = Message.bucket_operations(
+            [doc for doc in unflagged if doc['_id'] not in stored],
+            Message.bucket_size
+        )
+        if operations:
+            Message.bucket_collection.bulk_write(operations, ordered=True)
+
+        if flagged_error:
+            raise flagged_error
+
+    @staticmethod
+    def _stored_in_buckets(message_docs):
+        """IDs of the given messages that are already in a bucket."""
+        if not message_docs:
+            return set()
+
+        message_ids = [doc['_id'] for doc in message_docs]
+        # A bucket holding a message has last_id >= its _id, so only recent buckets are read
+        buckets = Message.bucket_collection.find(
+            {
+                'chat_session_id': {'$in': list({doc['chat_session_id'] for doc in message_docs})},
+                'last_id': {'$gte': min(message_ids)},
+                'messages._id': {'$in': message_ids}
+            },
+            {'messages._id': 1}
+        )
+        wanted = set(message_ids)
+        return {msg['_id'] for bucket in buckets for msg in bucket['messages'] if msg['_id'] in wanted}
+
+    @staticmethod
+    def _bucket_chunks(message_docs, bucket_size, window):
+        """Split messages (in _id order) into runs that fit one bucket's size and time window."""
+        chunk = []
+        for doc in message_docs:
+            if chunk and (len(chunk) >= bucket_size or doc['expires_at'] - chunk[0]['expires_at'] > window):
+                yield chunk
+                chunk = []
+            chunk.append(doc)
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def bucket_operations(message_docs, bucket_size, window=None):
+        """
+        Build the bucket appends for a batch of messages.
+
+        Each session's messages are pushed (in order) into a bucket that
+        still has room for all of them and whose oldest message expires
+        within `window` of the newest one pushed; the count and
+        first_expires_at guards make the upsert open a new bucket otherwise.
+
+        Returns:
+            list of UpdateOne operations
+        """
+        window = window or Message.bucket_window
+        by_session = {}
+        for doc in message_docs:
+            by_session.setdefault(doc['chat_session_id'], []).append(doc)
+
+        operations = []
+        for session_id, docs in by_session.items():
+            for chunk in Message._bucket_chunks(docs, bucket_size, window):
+                oldest = min(doc['expires_at'] for doc in chunk)
+                newest = max(doc['expires_at'] for doc in chunk)
+                operations.append(UpdateOne(
+                    {
+                        'chat_session_id': session_id,
+                        'count': {'$lte': bucket_size - len(chunk)},
+                        'first_expires_at': {'$gte': newest - window}
+                    },
+                    {
+                        '$push': {'messages': {'$each': [
+                            {field: doc[field] for field in Message.BUCKET_FIELDS} for doc in chunk
+                        ]}},
+                        '$inc': {'count': len(chunk)},
+                        '$min': {'first_id': chunk[0]['_id'], 'first_expires_at': oldest},
+                        '$max': {'last_id': chunk[-1]['_id'], 'expires_at': newest}
+                    },
+                    upsert=True
+                ))
+        return operations
+
+    @staticmethod
+    def to_buckets(session_id, message_docs, bucket_size, window=None):
+        """Pack a session's messages (sorted by _id) into full bucket documents."""
+        window = window or Message.bucket_window
+        buckets = []
+        for chunk in Message._bucket_chunks(message_docs, bucket_size, window):
+            buckets.append({
+                'chat_session_id': session_id,
+                'count': len(chunk),
+                'first_id': chunk[0]['_id'],
+                'last_id': chunk[-1]['_id'],
+                'first_expires_at': min(doc['expires_at'] for doc in chunk),
+                'expires_at': max(doc['expires_at'] for doc in chunk),
+                'messages': [{field: doc[field] for field in Message.BUCKET_FIELDS} for doc in chunk]
+            })
+        return buckets
+
     @staticmethod
     def find_by_session(session_id, limit=50, before=None):
-        """Find messages for a chat session with pagination."""
+        """
+        Find messages for a chat session with keyset pagination on _id.
+
+        Args:
+            session_id: Chat session ID
+            limit: Page size
+            before: Only return messages older than this message ID
+
+        Returns:
+            (messages in chronological order, has_more)
+        """
         if isinstance(session_id, str):
             session_id = ObjectId(session_id)
 
@@ -46,28 +227,100 @@ class Message:
                 before = ObjectId(before)
             query['_id'] = {'$lt': before}
 
+        # Walks the (chat_session_id, _id) index; one extra row tells if more exist
         messages = list(
-            Message.collection.find(query)
-            .sort('sent_at', -1)
-            .limit(limit)
+            Message.collection.find(query, Message.HISTORY_PROJECTION)
+            .sort('_id', -1)
+            .limit(limit + 1)
         )
+
+        if Message.bucket_size:
+            # Dual read: individual documents override bucket copies of the same message
+            merged = {msg['_id']: msg for msg in Message._find_in_buckets(session_id, limit, before)}
+            merged.update((msg['_id'], msg) for msg in messages)
+            messages = sorted(merged.values(), key=lambda msg: msg['_id'], reverse=True)[:limit + 1]
+
+        has_more = len(messages) > limit
+        messages = messages[:limit]
         messages.reverse()  # Return in chronological order
-        return messages
+        return messages, has_more
+
+    @staticmethod
+    def _find_in_buckets(session_id, limit, before=None):
+        """Newest limit + 1 live bucketed messages of a session (older than before), newest first."""
+        now = datetime.utcnow()
+        sent_after = now - Message.TTL
+        query = {'chat_session_id': session_id, 'expires_at': {'$gt': now}}
+        if before:
+            query['first_id'] = {'$lt': before}
+
+        collected = {}
+        cursor = Message.bucket_collection.find(query, {'messages': 1, 'last_id': 1}).sort('last_id', -1)
+        for bucket in cursor:
+            # Buckets can overlap when written concurrently; stop once none can add newer messages
+            if len(collected) > limit and bucket['last_id'] < sorted(collected, reverse=True)[limit]:
+                break
+            for msg in bucket['messages']:
+                # The bucket outlives its oldest messages by up to bucket_window
+                if msg['sent_at'] > sent_after and (not before or msg['_id'] < before):
+                    collected[msg['_id']] = msg
+
+        return sorted(collected.values(), key=lambda msg: msg['_id'], reverse=True)[:limit + 1]
+
+    @staticmethod
+    def _bucket_query(message_id):
+        """Query matching the bucket that holds a message."""
+        return {
+            'last_id': {'$gte': message_id},
+            'first_id': {'$lte': message_id},
+            'messages._id': message_id
+        }
 
     @staticmethod
     def flag_message(message_id, reason):
-        """Flag a message for moderation."""
+        """
+        Flag a message for moderation.
+
+        Messages flagged before (including ones an admin has since
+        reviewed) are left alone.
+
+        Returns:
+            True if the message was newly flagged
+        """
         if isinstance(message_id, str):
             message_id = ObjectId(message_id)
 
-        Message.collection.update_one(
-            {'_id': message_id},
-            {'$set': {
-                'is_flagged': True,
-                'moderation_status': 'flagged',
-                'flagged_reason': reason
-            }}
+        flag = {
+            'is_flagged': True,
+            'moderation_status': 'flagged',
+            'flagged_reason': reason
+        }
+
+        result = Message.collection.update_one({'_id': message_id, 'is_flagged': {'$ne': True}}, {'$set': flag})
+        if result.matched_count:
+            return True
+        if not Message.bucket_size or Message.collection.count_documents({'_id': message_id}, limit=1):
+            return False
+
+        # Bucketed: move the message out into an individual (indexed) document
+        bucket = Message.bucket_collection.find_one(
+            Message._bucket_query(message_id),
+            {'chat_session_id': 1, 'messages.$': 1}
+        )
+        if not bucket:
+            return False
+
+        message_doc = dict(bucket['messages'][0])
+        message_doc.update(flag)
+        message_doc['chat_session_id'] = bucket['chat_session_id']
+        message_doc['expires_at'] = message_doc['sent_at'] + Message.TTL
+        Message.collection.insert_one(message_doc)
+
+        Message.bucket_collection.update_one(
+            {'_id': bucket['_id']},
+            {'$pull': {'messages': {'_id': message_id}}, '$inc': {'count': -1}}
         )
+        return True
 
     @staticmethod
     def remove_message(message_id):
@@ -75,10 +328,75 @@ class Message:
         if isinstance(message_id, str):
             message_id = ObjectId(message_id)
 
-        Message.collection.update_one(
+        result = Message.collection.update_one(
             {'_id': message_id},
             {'$set': {'moderation_status': 'removed'}}
         )
+        if result.matched_count or not Message.bucket_size:
+            return
+
+        # Every copy, in case a racing replay stored the message twice
+        Message.bucket_collection.update_many(
+            Message._bucket_query(message_id),
+            {'$set': {'messages.$[msg].moderation_status': 'removed'}},
+            array_filters=[{'msg._id': message_id}]
+        )
+
+    @staticmethod
+    def find_flagged(status='flagged', limit=20, before=None):
+        """
+        Find flagged messages for the review queue, newest first.
+
+        Served by the partial flagged_queue index, so the cost follows the
+        number of flagged messages rather than total traffic.
+
+        Args:
+            status: Moderation status to list ('flagged' = awaiting review)
+            limit: Page size
+            before: Only return messages older than this message ID
+
+        Returns:
+            (messages, has_more)
+        """
+        query = {'is_flagged': True, 'moderation_status': status}
+
+        if before:
+            if isinstance(before, str):
+                before = ObjectId(before)
+            query['_id'] = {'$lt': before}
+
+        messages = list(
+            Message.collection.find(query)
+            .sort('_id', -1)
+            .limit(limit + 1)
+        )
+        return messages[:limit], len(messages) > limit
+
+    @staticmethod
+    def resolve_flag(message_id, action, admin_id):
+        """
+        Resolve a flagged message after review.
+
+        Args:
+            message_id: Flagged message ID
+            action: 'approve' (keep visible) or 'remove'
+            admin_id: Reviewing admin
+
+        Returns:
+            True if a message awaiting review was resolved
+        """
+        if isinstance(message_id, str):
+            message_id = ObjectId(message_id)
+
+        result = Message.collection.update_one(
+            {'_id': message_id, 'is_flagged': True, 'moderation_status': 'flagged'},
+            {'$set': {
+                'moderation_status': 'approved' if action == 'approve' else 'removed',
+                'reviewed_by': admin_id,
+                'reviewed_at': datetime.utcnow()
+            }}
+        )
+        return result.modified_count == 1
 
     @staticmethod
     def to_dict(message_doc, current_user_id):
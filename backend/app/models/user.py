@@ -1,8 +1,15 @@
 """User model."""
+import re
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 import bcrypt
 from ..extensions import db
+from ..services.listener_index import ListenerIndex
+from ..services.match_cache import MatchCache
+from ..services.batch_scorer import BatchScorer
+from ..services.password_pool import PasswordPool
+from ..services.revocation import RevocationFeed
 
 
 class User:
@@ -38,6 +45,8 @@ class User:
             }
         }
 
+        user_doc['match_static'] = BatchScorer.static_components(user_doc)
+
         # Hash password if provided (for email/password users)
         if 'password' in data:
             user_doc['password_hash'] = User.hash_password(data['password'])
@@ -53,6 +62,15 @@ class User:
             user_id = ObjectId(user_id)
         return User.collection.find_one({'_id': user_id})
 
+    @staticmethod
+    def find_pseudonyms(user_ids):
+        """Get current pseudonyms for several users in one query (user ID -> pseudonym)."""
+        user_ids = [ObjectId(user_id) if isinstance(user_id, str) else user_id for user_id in user_ids]
+        return {
+            user['_id']: user['pseudonym']
+            for user in User.collection.find({'_id': {'$in': user_ids}}, {'pseudonym': 1})
+        }
+
     @staticmethod
     def find_by_email(email):
         """Find user by email."""
@@ -63,6 +81,33 @@ class User:
         """Find user by pseudonym."""
         return User.collection.find_one({'pseudonym': pseudonym})
 
+    @staticmethod
+    def find_pseudonyms_with_prefix(base):
+        """
+        Get the set of taken pseudonyms equal to base or base followed by digits.
+
+        The anchored prefix regex is answered from the pseudonym index.
+        """
+        cursor = User.collection.find(
+            {'pseudonym': {'$regex': f'^{re.escape(base)}[0-9]*$'}},
+            {'pseudonym': 1, '_id': 0}
+        )
+        return {doc['pseudonym'] for doc in cursor}
+
+    @staticmethod
+    def duplicate_key_field(error):
+        """Name of the unique field a DuplicateKeyError was raised for."""
+        details = error.details or {}
+        key_pattern = details.get('keyPattern') or details.get('keyValue') or {}
+        if key_pattern:
+            return next(iter(key_pattern))
+
+        message = details.get('errmsg', str(error))
+        for field in ('email', 'pseudonym'):
+            if f'{field}_1' in message:
+                return field
+        return None
+
     @staticmethod
     def find_by_oauth(provider, oauth_id):
         """Find user by OAuth provider and ID."""
@@ -78,11 +123,29 @@ class User:
             user_id = ObjectId(user_id)
 
         update_data = {**data, 'updated_at': datetime.utcnow()}
-        User.collection.update_one(
+        if 'listener_topics' in data or 'interests' in data:
+            # Pipeline update so match_static is refreshed in the same write
+            update = [
+                {'$set': {key: {'$literal': value} for key, value in update_data.items()}},
+                User._match_static_stage()
+            ]
+        else:
+            update = {'$set': update_data}
+
+        previous = User.collection.find_one_and_update(
             {'_id': user_id},
-            {'$set': update_data}
+            update,
+            return_document=ReturnDocument.BEFORE
         )
-        return User.find_by_id(user_id)
+        updated = User.find_by_id(user_id)
+
+        # Languages/topics feed the availability index
+        if 'languages' in data or 'listener_topics' in data:
+            ListenerIndex.sync_user(updated, previous)
+
+        User._listener_changed(updated, previous)
+
+        return updated
 
     @staticmethod
     def update_availability(user_id, availability):
@@ -90,13 +153,64 @@ class User:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
 
-        User.collection.update_one(
+        user = User.collection.find_one_and_update(
             {'_id': user_id},
             {'$set': {
                 'listener_availability': availability,
                 'updated_at': datetime.utcnow()
-            }}
+            }},
+            projection={'roles': 1, 'languages': 1, 'listener_topics': 1,
+                        'listener_availability': 1, 'is_active': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        ListenerIndex.sync_user(user)
+        User._listener_changed(user)
+
+    @staticmethod
+    def reserve_listener(user_id):
+        """
+        Atomically flip an available listener to in_chat.
+
+        Returns:
+            the updated listener document, or None if the listener does not
+            exist or was not available (e.g. another sharer reserved them first)
+        """
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+
+        listener = User.collection.find_one_and_update(
+            {
+                '_id': user_id,
+                'roles': 'listener',
+                'listener_availability': 'available',
+                'is_active': True
+            },
+            {'$set': {
+                'listener_availability': 'in_chat',
+                'updated_at': datetime.utcnow()
+            }},
+            return_document=ReturnDocument.AFTER
         )
+        ListenerIndex.sync_user(listener)
+        User._listener_changed(listener)
+        return listener
+
+    @staticmethod
+    def release_listener(user_id):
+        """Undo reserve_listener, making an in_chat listener available again."""
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+
+        listener = User.collection.find_one_and_update(
+            {'_id': user_id, 'listener_availability': 'in_chat'},
+            {'$set': {
+                'listener_availability': 'available',
+                'updated_at': datetime.utcnow()
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+        ListenerIndex.sync_user(listener)
+        User._listener_changed(listener)
 
     @staticmethod
     def update_rating(user_id, new_rating):
@@ -104,13 +218,19 @@ class User:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
 
-        User.collection.update_one(
+        user = User.collection.find_one_and_update(
             {'_id': user_id},
-            {'$set': {
-                'listener_rating': new_rating,
-                'updated_at': datetime.utcnow()
-            }}
+            [
+                {'$set': {
+                    'listener_rating': new_rating,
+                    'updated_at': datetime.utcnow()
+                }},
+                User._match_static_stage()
+            ],
+            projection={'roles': 1, 'languages': 1},
+            return_document=ReturnDocument.AFTER
         )
+        User._listener_changed(user)
 
     @staticmethod
     def increment_chat_count(user_id):
@@ -118,10 +238,45 @@ class User:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
 
-        User.collection.update_one(
+        user = User.collection.find_one_and_update(
             {'_id': user_id},
-            {'$inc': {'listener_total_chats': 1}}
+            [
+                {'$set': {'listener_total_chats': {'$add': [{'$ifNull': ['$listener_total_chats', 0]}, 1]}}},
+                User._match_static_stage()
+            ],
+            projection={'roles': 1, 'languages': 1},
+            return_document=ReturnDocument.AFTER
         )
+        User._listener_changed(user)
+
+    @staticmethod
+    def _match_static_stage():
+        """
+        Update pipeline stage recomputing match_static from the document.
+
+        Mirrors BatchScorer.static_components so the listener-only parts of
+        the match score are stored with the listener.
+        """
+        def lowercased_set(field):
+            return {'$setUnion': [{'$map': {
+                'input': {'$ifNull': [field, []]},
+                'in': {'$toLower': '$$this'}
+            }}]}
+
+        return {'$set': {'match_static': {
+            'bonus': {'$add': [
+                {'$max': [{'$multiply': [{'$subtract': [{'$ifNull': ['$listener_rating', 0.0]}, 3.0]}, 10]}, 0]},
+                {'$min': [{'$divide': [{'$ifNull': ['$listener_total_chats', 0]}, 10]}, 20]}
+            ]},
+            'topics': lowercased_set('$listener_topics'),
+            'interests': lowercased_set('$interests')
+        }}}
+
+    @staticmethod
+    def _listener_changed(user_doc, previous_doc=None):
+        """Invalidate cached match candidates after a listener changes."""
+        if user_doc and 'listener' in user_doc.get('roles', []):
+            MatchCache.invalidate_listener(user_doc, previous_doc)
 
     @staticmethod
     def ban(user_id):
@@ -129,13 +284,17 @@ class User:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
 
-        User.collection.update_one(
+        user = User.collection.find_one_and_update(
             {'_id': user_id},
             {'$set': {
                 'is_active': False,
                 'updated_at': datetime.utcnow()
-            }}
+            }},
+            return_document=ReturnDocument.AFTER
         )
+        ListenerIndex.remove(user)
+        User._listener_changed(user)
+        RevocationFeed.revoke(user_id)
 
     @staticmethod
     def unban(user_id):
@@ -143,30 +302,65 @@ class User:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
 
-        User.collection.update_one(
+        user = User.collection.find_one_and_update(
             {'_id': user_id},
             {'$set': {
                 'is_active': True,
                 'updated_at': datetime.utcnow()
-            }}
+            }},
+            return_document=ReturnDocument.AFTER
         )
+        ListenerIndex.sync_user(user)
+        User._listener_changed(user)
+        RevocationFeed.restore(user_id)
 
     @staticmethod
     def find_available_listeners(filters=None):
-        """Find available listeners with optional filters."""
+        """
+        Find available listeners with optional filters.
+
+        Candidate IDs come from the Redis availability index when it is ready,
+        so MongoDB only loads listeners that can match. The MongoDB predicate
+        is still applied to every candidate, which guards against index drift.
+        """
         query = {
             'roles': 'listener',
             'listener_availability': 'available',
             'is_active': True
         }
 
+        language = None
         if filters:
-            if 'language' in filters:
-                query['languages'] = filters['language']
-            if 'min_rating' in filters:
+            if filters.get('language'):
+                language = filters['language']
+                query['languages'] = language
+            if filters.get('min_rating') is not None:
                 query['listener_rating'] = {'$gte': filters['min_rating']}
 
-        return list(User.collection.find(query))
+        candidate_ids = ListenerIndex.candidate_ids(language=language)
+        if candidate_ids is None:
+            # Index not built yet (or Redis unavailable) - rebuild for next time,
+            # at most once per interval across workers
+            listeners = list(User.collection.find(query))
+            try:
+                ListenerIndex.rebuild_if_due(User.collection)
+            except Exception:
+                pass
+            return listeners
+
+        if not candidate_ids:
+            return []
+
+        query['_id'] = {'$in': [ObjectId(listener_id) for listener_id in candidate_ids]}
+        listeners = list(User.collection.find(query))
+
+        # Consistency check: IDs the index returned that MongoDB no longer
+        # considers available are dropped from the index
+        if 'listener_rating' not in query and len(listeners) < len(candidate_ids):
+            found = {str(listener['_id']) for listener in listeners}
+            ListenerIndex.discard_stale(candidate_ids - found)
+
+        return listeners
 
     @staticmethod
     def get_all(filters=None, page=1, limit=20):
@@ -192,13 +386,13 @@ class User:
 
     @staticmethod
     def hash_password(password):
-        """Hash a password using bcrypt."""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """Hash a password using bcrypt (on the password pool)."""
+        return PasswordPool.run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
     @staticmethod
     def verify_password(password, password_hash):
-        """Verify a password against its hash."""
-        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        """Verify a password against its hash (on the password pool)."""
+        return PasswordPool.run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
 
     @staticmethod
     def to_dict(user_doc, include_sensitive=False):
@@ -1,17 +1,23 @@
 """Admin routes."""
+from bson import ObjectId
 from flask import Blueprint, request, jsonify
-from ..middleware.auth import jwt_required_custom, admin_required
+from ..middleware.auth import jwt_claims_required, admin_required
 from ..middleware.admin import admin_action_logged
 from ..models.user import User
 from ..models.chat import ChatSession
 from ..models.report import Report
+from ..models.message import Message
+from ..services.listener_index import ListenerIndex
+from ..services.metrics import Metrics
+from ..services.moderation_rescan import ModerationRescan
+from ..sockets.session_state import SocketIdentity
 from ..extensions import db, socketio
 
 bp = Blueprint('admin', __name__)
 
 
 @bp.route('/stats', methods=['GET'])
-@jwt_required_custom
+@jwt_claims_required
 @admin_required
 def get_stats(current_user):
     """Get platform statistics."""
@@ -66,8 +72,160 @@ def get_stats(current_user):
     }), 200
 
 
+@bp.route('/metrics', methods=['GET'])
+@jwt_claims_required
+@admin_required
+def get_metrics(current_user):
+    """Get in-process performance metrics for this worker."""
+    return jsonify(Metrics.snapshot()), 200
+
+
+@bp.route('/listener-index', methods=['GET'])
+@jwt_claims_required
+@admin_required
+def check_listener_index(current_user):
+    """Compare the available-listener index with MongoDB, repairing drift."""
+    repair = request.args.get('repair', 'true').lower() == 'true'
+    result = ListenerIndex.check_consistency(db.users, repair=repair)
+
+    return jsonify({
+        'missing_count': len(result['missing']),
+        'stale_count': len(result['stale']),
+        'missing': result['missing'],
+        'stale': result['stale'],
+        'repaired': result['repaired']
+    }), 200
+
+
+@bp.route('/moderation/rescan', methods=['POST'])
+@jwt_claims_required
+@admin_required
+@admin_action_logged('moderation_rescan')
+def start_moderation_rescan(current_user):
+    """Queue a re-scan of live messages with the current moderation rules."""
+    job_id, error = ModerationRescan.enqueue(current_user['_id'])
+
+    if error:
+        return jsonify({'error': error}), 409
+
+    return jsonify({
+        'message': 'Rescan queued',
+        'job_id': job_id,
+        'status': 'queued'
+    }), 200
+
+
+@bp.route('/moderation/rescan/<job_id>', methods=['GET'])
+@jwt_claims_required
+@admin_required
+def get_moderation_rescan(current_user, job_id):
+    """Get progress of a moderation re-scan job."""
+    progress = ModerationRescan.get_progress(job_id)
+
+    if not progress:
+        return jsonify({'error': 'Rescan job not found'}), 404
+
+    return jsonify({'job_id': job_id, **progress}), 200
+
+
+@bp.route('/moderation/queue', methods=['GET'])
+@jwt_claims_required
+@admin_required
+def get_moderation_queue(current_user):
+    """List flagged messages awaiting review, with their session context."""
+    try:
+        limit = max(min(int(request.args.get('limit', 20)), 100), 1)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    before = request.args.get('before')
+    status = request.args.get('status', 'flagged')
+
+    allowed_statuses = ['flagged', 'approved', 'removed']
+    if status not in allowed_statuses:
+        return jsonify({'error': f'Invalid status. Allowed: {", ".join(allowed_statuses)}'}), 400
+
+    if before and not ObjectId.is_valid(before):
+        return jsonify({'error': 'Invalid before cursor'}), 400
+
+    messages, has_more = Message.find_flagged(status, limit=limit, before=before)
+
+    # Fetch sessions and senders for the whole page at once
+    sessions = {
+        session['_id']: session
+        for session in db.chat_sessions.find(
+            {'_id': {'$in': list({msg['chat_session_id'] for msg in messages})}},
+            {'sharer_id': 1, 'listener_id': 1, 'status': 1, 'topic': 1, 'started_at': 1}
+        )
+    }
+    pseudonyms = {
+        user['_id']: user['pseudonym']
+        for user in db.users.find(
+            {'_id': {'$in': list({msg['sender_id'] for msg in messages})}},
+            {'pseudonym': 1}
+        )
+    }
+
+    formatted_messages = []
+    for msg in messages:
+        session = sessions.get(msg['chat_session_id'])
+        formatted_messages.append({
+            'id': str(msg['_id']),
+            'content': msg['content'],
+            'sent_at': msg['sent_at'].isoformat(),
+            'moderation_status': msg['moderation_status'],
+            'flagged_reason': msg.get('flagged_reason'),
+            'sender': {
+                'id': str(msg['sender_id']),
+                'pseudonym': pseudonyms.get(msg['sender_id']),
+                'role': msg['sender_role']
+            },
+            'session': {
+                'id': str(msg['chat_session_id']),
+                'status': session['status'],
+                'topic': session.get('topic'),
+                'started_at': session['started_at'].isoformat()
+            } if session else None
+        })
+
+    return jsonify({
+        'messages': formatted_messages,
+        'has_more': has_more,
+        'next_before': formatted_messages[-1]['id'] if has_more else None
+    }), 200
+
+
+@bp.route('/moderation/messages/<message_id>', methods=['PATCH'])
+@jwt_claims_required
+@admin_required
+@admin_action_logged('resolve_flagged_message')
+def resolve_flagged_message(current_user, message_id):
+    """Approve or remove a flagged message."""
+    if not ObjectId.is_valid(message_id):
+        return jsonify({'error': 'Invalid message ID'}), 400
+
+    data = request.get_json()
+
+    if not data or data.get('action') not in ['approve', 'remove']:
+        return jsonify({'error': 'action must be approve or remove'}), 400
+
+    if not Message.resolve_flag(message_id, data['action'], current_user['_id']):
+        return jsonify({'error': 'Flagged message not found or already resolved'}), 404
+
+    # Close the matching escalation events
+    db.moderation_events.update_many(
+        {'message_id': message_id, 'status': 'open'},
+        {'$set': {'status': 'resolved', 'resolution': data['action']}}
+    )
+
+    return jsonify({
+        'message': 'Flagged message resolved',
+        'message_id': message_id,
+        'action': data['action']
+    }), 200
+
+
 @bp.route('/users', methods=['GET'])
-@jwt_required_custom
+@jwt_claims_required
 @admin_required
 def get_users(current_user):
     """Get all users with filtering and pagination."""
@@ -113,7 +271,7 @@ def get_users(current_user):
 
 
 @bp.route('/users/<user_id>/ban', methods=['PATCH'])
-@jwt_required_custom
+@jwt_claims_required
 @admin_required
 @admin_action_logged('ban_user')
 def ban_user(current_user, user_id):
@@ -146,6 +304,7 @@ def ban_user(current_user, user_id):
         socketio.emit('account_banned', {
             'reason': reason
         }, room=user_id)
+        SocketIdentity.invalidate_user(user_id)
 
     action = 'unbanned' if is_active else 'banned'
     return jsonify({
@@ -155,7 +314,7 @@ def ban_user(current_user, user_id):
 
 
 @bp.route('/reports', methods=['GET'])
-@jwt_required_custom
+@jwt_claims_required
 @admin_required
 def get_reports(current_user):
     """Get all reports with filtering."""
@@ -202,7 +361,7 @@ def get_reports(current_user):
 
 
 @bp.route('/reports/<report_id>', methods=['PATCH'])
-@jwt_required_custom
+@jwt_claims_required
 @admin_required
 @admin_action_logged('resolve_report')
 def update_report(current_user, report_id):
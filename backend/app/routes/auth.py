@@ -1,14 +1,26 @@
 """Authentication routes."""
+import time
 from flask import Blueprint, request, jsonify, make_response
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, decode_token
 from ..services.auth_service import AuthService
+from ..services.password_pool import PasswordPoolSaturated
 from ..models.user import User
-from ..extensions import redis_client
+from ..middleware.blocklist import TokenBlocklist
+from ..middleware.rate_limit import rate_limited
 
 bp = Blueprint('auth', __name__)
 
 
+@bp.errorhandler(PasswordPoolSaturated)
+def password_pool_saturated(error):
+    """Shed login/register load when the bcrypt pool is saturated."""
+    response = jsonify({'error': 'Server is busy, please try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
 @bp.route('/register', methods=['POST'])
+@rate_limited('auth')
 def register():
     """Register new user with email/password."""
     data = request.get_json()
@@ -44,6 +56,7 @@ def register():
 
 
 @bp.route('/login', methods=['POST'])
+@rate_limited('auth')
 def login():
     """Login with email/password, receive JWT tokens."""
     data = request.get_json()
@@ -65,7 +78,7 @@ def login():
         return jsonify({'error': error}), status_code
 
     # Create tokens
-    access_token, refresh_token = AuthService.create_tokens(user['_id'])
+    access_token, refresh_token = AuthService.create_tokens(user)
 
     # Create response with tokens in httpOnly cookies
     response = make_response(jsonify({
@@ -96,6 +109,7 @@ def login():
 
 
 @bp.route('/google', methods=['POST'])
+@rate_limited('auth')
 def google_oauth():
     """OAuth login/register with Google."""
     data = request.get_json()
@@ -118,7 +132,7 @@ def google_oauth():
         return jsonify({'error': error}), 409
 
     # Create tokens
-    access_token, refresh_token = AuthService.create_tokens(user['_id'])
+    access_token, refresh_token = AuthService.create_tokens(user)
 
     # Create response
     response = make_response(jsonify({
@@ -149,6 +163,7 @@ def google_oauth():
 
 
 @bp.route('/refresh', methods=['POST'])
+@rate_limited('auth')
 @jwt_required(refresh=True)
 def refresh():
     """Refresh expired access token using refresh token."""
@@ -162,9 +177,8 @@ def refresh():
     if not user.get('is_active', True):
         return jsonify({'error': 'Account is inactive'}), 403
 
-    # Create new access token
-    from flask_jwt_extended import create_access_token
-    access_token = create_access_token(identity=user_id)
+    # Create new access token (with a fresh user snapshot)
+    access_token = AuthService.issue_access_token(user)
 
     # Return with new cookie
     response = make_response(jsonify({
@@ -187,11 +201,18 @@ def refresh():
 @jwt_required()
 def logout():
     """Logout user, invalidate tokens."""
-    # Get JTI (JWT ID) to blacklist
-    jti = get_jwt()['jti']
-
-    # Add refresh token to Redis blacklist (expires in 7 days)
-    redis_client.setex(f'blacklist:{jti}', 604800, 'true')
+    # Blocklist the access token for the rest of its lifetime
+    claims = get_jwt()
+    TokenBlocklist.revoke(claims['jti'], max(int(claims['exp'] - time.time()), 1))
+
+    # Blocklist the refresh token too, if the client sent it
+    refresh_token = request.cookies.get('refresh_token')
+    if refresh_token:
+        try:
+            refresh_claims = decode_token(refresh_token)
+            TokenBlocklist.revoke(refresh_claims['jti'], max(int(refresh_claims['exp'] - time.time()), 1))
+        except Exception:
+            pass  # Already invalid or expired
 
     # Clear cookies
     response = make_response(jsonify({
@@ -1,16 +1,17 @@
 """Chat routes."""
 from flask import Blueprint, request, jsonify
-from ..middleware.auth import jwt_required_custom
+from ..middleware.auth import jwt_claims_required
 from ..models.chat import ChatSession
 from ..models.message import Message
 from ..models.user import User
+from ..services.message_cache import RecentMessageCache
 from ..extensions import socketio
 
 bp = Blueprint('chat', __name__)
 
 
 @bp.route('/sessions/active', methods=['GET'])
-@jwt_required_custom
+@jwt_claims_required
 def get_active_session(current_user):
     """Get user's current active chat session."""
     session = ChatSession.find_active_by_user(current_user['_id'])
@@ -38,7 +39,7 @@ def get_active_session(current_user):
 
 
 @bp.route('/sessions/<session_id>/messages', methods=['GET'])
-@jwt_required_custom
+@jwt_claims_required
 def get_messages(current_user, session_id):
     """Get messages for specific chat session."""
     # Verify session exists
@@ -55,18 +56,21 @@ def get_messages(current_user, session_id):
     limit = min(int(request.args.get('limit', 50)), 200)
     before = request.args.get('before')
 
-    # Get messages
-    messages = Message.find_by_session(session_id, limit=limit, before=before)
+    # Get messages (first page from the recent-message cache when possible)
+    cached = None if before else RecentMessageCache.get_page(session_id, limit)
+    if cached:
+        messages, has_more = cached
+    else:
+        messages, has_more = Message.find_by_session(session_id, limit=limit, before=before)
 
-    # Get partner info for pseudonym
-    partner_id = session['listener_id'] if str(session['sharer_id']) == user_id_str else session['sharer_id']
-    partner = User.find_by_id(partner_id)
+    # Current pseudonyms of both participants (the token's may predate a rename)
+    pseudonyms = User.find_pseudonyms([session['sharer_id'], session['listener_id']])
 
     # Format messages
     formatted_messages = []
     for msg in messages:
         is_own = str(msg['sender_id']) == user_id_str
-        sender_pseudonym = current_user['pseudonym'] if is_own else partner['pseudonym']
+        sender_pseudonym = pseudonyms.get(msg['sender_id'])
 
         formatted_messages.append({
             'id': str(msg['_id']),
@@ -76,8 +80,6 @@ def get_messages(current_user, session_id):
             'is_own_message': is_own
         })
 
-    has_more = len(messages) == limit
-
     return jsonify({
         'messages': formatted_messages,
         'has_more': has_more
@@ -85,7 +87,7 @@ def get_messages(current_user, session_id):
 
 
 @bp.route('/sessions/<session_id>/end', methods=['POST'])
-@jwt_required_custom
+@jwt_claims_required
 def end_chat(current_user, session_id):
     """End active chat session."""
     # Verify session exists
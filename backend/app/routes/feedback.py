@@ -1,6 +1,6 @@
 """Feedback routes."""
 from flask import Blueprint, request, jsonify
-from ..middleware.auth import jwt_required_custom
+from ..middleware.auth import jwt_claims_required
 from ..models.feedback import Feedback
 from ..models.chat import ChatSession
 from ..models.user import User
@@ -9,7 +9,7 @@ bp = Blueprint('feedback', __name__)
 
 
 @bp.route('', methods=['POST'])
-@jwt_required_custom
+@jwt_claims_required
 def submit_feedback(current_user):
     """Submit feedback for chat partner after session ends."""
     data = request.get_json()
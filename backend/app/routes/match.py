@@ -1,7 +1,8 @@
 """Matching routes."""
-from flask import Blueprint, request, jsonify
-from ..middleware.auth import jwt_required_custom, role_required
+from flask import Blueprint, request, jsonify, current_app
+from ..middleware.auth import jwt_required_custom, jwt_claims_required, role_required
 from ..services.matching_service import MatchingService
+from ..services.matching_workers import MatchingWorkers
 from ..models.chat import ChatSession
 from ..models.user import User
 from ..extensions import socketio
@@ -10,20 +11,19 @@ bp = Blueprint('match', __name__)
 
 
 @bp.route('/find-listeners', methods=['POST'])
-@jwt_required_custom
+@jwt_claims_required
 @role_required('sharer')
 def find_listeners(current_user):
     """Get top 3 suggested listeners based on preferences."""
-    data = request.get_json() or {}
-
-    preferences = {
-        'topic': data.get('topic'),
-        'language': data.get('language'),
-        'preferred_min_rating': data.get('preferred_min_rating')
-    }
+    preferences, error = MatchingService.clean_preferences(request.get_json() or {})
+    if error:
+        return jsonify({'error': error}), 400
 
-    # Find matches
-    matches = MatchingService.find_matches(current_user['_id'], preferences)
+    # Find matches (on a worker process when partitioned matching is enabled)
+    if current_app.config['MATCH_WORKER_PARTITIONS']:
+        matches = MatchingWorkers.request_matches(current_user['_id'], preferences)
+    else:
+        matches = MatchingService.find_matches(current_user['_id'], preferences)
 
     if not matches:
         return jsonify({
@@ -52,33 +52,34 @@ def request_chat(current_user):
     if active_session:
         return jsonify({'error': 'You already have an active chat session'}), 409
 
-    # Verify listener exists and is available
-    listener = User.find_by_id(listener_id)
+    # Reserve the listener: a single conditional update flips them from
+    # available to in_chat, so concurrent requests cannot both win
+    listener = User.reserve_listener(listener_id)
     if not listener:
-        return jsonify({'error': 'Listener not found'}), 404
+        listener = User.find_by_id(listener_id)
+        if not listener:
+            return jsonify({'error': 'Listener not found'}), 404
 
-    if listener.get('listener_availability') != 'available':
-        return jsonify({'error': 'Listener is not available'}), 400
+        if not listener.get('is_active', True):
+            return jsonify({'error': 'Listener account is inactive'}), 400
 
-    if not listener.get('is_active', True):
-        return jsonify({'error': 'Listener account is inactive'}), 400
+        if listener.get('listener_availability') == 'in_chat':
+            return jsonify({'error': 'Listener is currently in another chat'}), 409
 
-    # Check if listener has active chat
-    listener_active_session = ChatSession.find_active_by_user(listener_id)
-    if listener_active_session:
-        return jsonify({'error': 'Listener is currently in another chat'}), 409
+        return jsonify({'error': 'Listener is not available'}), 400
 
     # Create chat session
     language = current_user.get('languages', ['English'])[0]  # Use first language
-    session = ChatSession.create(
-        sharer_id=current_user['_id'],
-        listener_id=listener_id,
-        topic=topic,
-        language=language
-    )
-
-    # Update listener availability to in_chat
-    User.update_availability(listener_id, 'in_chat')
+    try:
+        session = ChatSession.create(
+            sharer_id=current_user['_id'],
+            listener_id=listener_id,
+            topic=topic,
+            language=language
+        )
+    except Exception:
+        User.release_listener(listener_id)
+        raise
 
     # Send Socket.IO notification to listener
     socketio.emit('chat_request', {
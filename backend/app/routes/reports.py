@@ -1,6 +1,6 @@
 """Reports routes."""
 from flask import Blueprint, request, jsonify
-from ..middleware.auth import jwt_required_custom
+from ..middleware.auth import jwt_claims_required
 from ..models.report import Report
 from ..models.user import User
 
@@ -8,7 +8,7 @@ bp = Blueprint('reports', __name__)
 
 
 @bp.route('', methods=['POST'])
-@jwt_required_custom
+@jwt_claims_required
 def submit_report(current_user):
     """Report user or message for abuse."""
     data = request.get_json()
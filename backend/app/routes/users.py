@@ -2,8 +2,10 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 import os
-from ..middleware.auth import jwt_required_custom, role_required
+from ..middleware.auth import jwt_required_custom, jwt_claims_required, role_required
 from ..models.user import User
+from ..models.chat import ChatSession
+from ..services.auth_service import AuthService
 from ..extensions import socketio
 
 bp = Blueprint('users', __name__)
@@ -47,7 +49,12 @@ def update_profile(current_user):
     # Update user
     updated_user = User.update(current_user['_id'], update_data)
 
-    return jsonify(User.to_dict(updated_user)), 200
+    response = User.to_dict(updated_user)
+    if updated_user['pseudonym'] != current_user['pseudonym']:
+        # Access tokens carry the pseudonym; hand out one with the new claims
+        response['access_token'] = AuthService.issue_access_token(updated_user)
+
+    return jsonify(response), 200
 
 
 @bp.route('/me/avatar', methods=['POST'])
@@ -92,7 +99,7 @@ def upload_avatar(current_user):
 
 
 @bp.route('/me/availability', methods=['PATCH'])
-@jwt_required_custom
+@jwt_claims_required
 @role_required('listener')
 def update_availability(current_user):
     """Update listener availability status."""
@@ -107,6 +114,10 @@ def update_availability(current_user):
     if availability not in allowed_statuses:
         return jsonify({'error': f'Invalid status. Allowed: {", ".join(allowed_statuses)}'}), 400
 
+    # Reservation only checks availability, so a listener in a chat must not reopen it
+    if availability == 'available' and ChatSession.find_active_by_user(current_user['_id']):
+        return jsonify({'error': 'End your active chat session before becoming available'}), 409
+
     # Update availability
     User.update_availability(current_user['_id'], availability)
 
@@ -1,14 +1,17 @@
 """Authentication service for JWT and OAuth handling."""
 from flask import current_app
 from flask_jwt_extended import create_access_token, create_refresh_token
-from authlib.integrations.requests_client import OAuth2Session
+from pymongo.errors import DuplicateKeyError
 from ..models.user import User
+from .google_client import GoogleUserInfoClient
 import re
 
 
 class AuthService:
     """Handle authentication operations."""
 
+    PSEUDONYM_ATTEMPTS = 3
+
     @staticmethod
     def register_user(email, password, pseudonym, roles):
         """Register a new user with email/password."""
@@ -16,14 +19,6 @@ class AuthService:
         if not AuthService.validate_email(email):
             return None, 'Invalid email format'
 
-        # Check if email already exists
-        if User.find_by_email(email):
-            return None, 'Email already exists'
-
-        # Check if pseudonym already exists
-        if User.find_by_pseudonym(pseudonym):
-            return None, 'Pseudonym already exists'
-
         # Validate password
         error = AuthService.validate_password(password)
         if error:
@@ -40,13 +35,18 @@ class AuthService:
         if not all(role in ['sharer', 'listener'] for role in roles):
             return None, 'Invalid role specified'
 
-        # Create user
-        user = User.create({
-            'email': email,
-            'password': password,
-            'pseudonym': pseudonym,
-            'roles': roles
-        })
+        # Create user; the unique indexes reject duplicate emails/pseudonyms
+        try:
+            user = User.create({
+                'email': email,
+                'password': password,
+                'pseudonym': pseudonym,
+                'roles': roles
+            })
+        except DuplicateKeyError as e:
+            if User.duplicate_key_field(e) == 'pseudonym':
+                return None, 'Pseudonym already exists'
+            return None, 'Email already exists'
 
         return user, None
 
@@ -74,22 +74,11 @@ class AuthService:
     def verify_google_token(credential):
         """Verify Google OAuth token and return user info."""
         try:
-            client = OAuth2Session(
-                current_app.config['GOOGLE_CLIENT_ID'],
-                current_app.config['GOOGLE_CLIENT_SECRET']
-            )
-
-            # Exchange credential for user info
-            token_url = 'https://oauth2.googleapis.com/token'
-            userinfo_url = 'https://www.googleapis.com/oauth2/v3/userinfo'
-
-            # Get user info from Google
-            response = client.get(userinfo_url, token=credential)
-            if response.status_code != 200:
+            # Get user info from Google (pooled connection, short-TTL cache)
+            user_info = GoogleUserInfoClient.fetch(credential)
+            if user_info is None:
                 return None, 'Failed to verify Google token'
 
-            user_info = response.json()
-
             return {
                 'email': user_info.get('email'),
                 'name': user_info.get('name'),
@@ -116,47 +105,70 @@ class AuthService:
                 return None, 'Account is inactive'
             return user, None
 
-        # Check if email already exists (different auth method)
-        user = User.find_by_email(email)
-        if user:
-            return None, 'Email already in use with different login method'
-
         # New user - register
         # Generate unique pseudonym from name
         base_pseudonym = user_info['name'].replace(' ', '').replace('.', '')
-        pseudonym = AuthService.generate_unique_pseudonym(base_pseudonym)
-
-        user = User.create({
-            'email': email,
-            'oauth_provider': 'google',
-            'oauth_id': google_id,
-            'pseudonym': pseudonym,
-            'real_name': user_info['name'],
-            'profile_picture_url': user_info.get('picture'),
-            'roles': ['sharer']  # Default role for new OAuth users
-        })
 
-        return user, None
+        # Retry only if another signup took the same pseudonym meanwhile
+        for _ in range(AuthService.PSEUDONYM_ATTEMPTS):
+            pseudonym = AuthService.generate_unique_pseudonym(base_pseudonym)
+            try:
+                user = User.create({
+                    'email': email,
+                    'oauth_provider': 'google',
+                    'oauth_id': google_id,
+                    'pseudonym': pseudonym,
+                    'real_name': user_info['name'],
+                    'profile_picture_url': user_info.get('picture'),
+                    'roles': ['sharer']  # Default role for new OAuth users
+                })
+                return user, None
+            except DuplicateKeyError as e:
+                # Email already exists (different auth method)
+                if User.duplicate_key_field(e) != 'pseudonym':
+                    return None, 'Email already in use with different login method'
+
+        return None, 'Could not allocate a unique pseudonym, please try again'
 
     @staticmethod
     def generate_unique_pseudonym(base):
-        """Generate a unique pseudonym."""
-        pseudonym = base
-        counter = 1
+        """
+        Generate a unique pseudonym.
+
+        Returns base if free, otherwise base followed by the smallest free
+        counter (base1, base2, ...). Taken names come from one query.
+        """
+        taken = User.find_pseudonyms_with_prefix(base)
 
-        while User.find_by_pseudonym(pseudonym):
-            pseudonym = f"{base}{counter}"
+        if base not in taken:
+            return base
+
+        counter = 1
+        while f"{base}{counter}" in taken:
             counter += 1
 
-        return pseudonym
+        return f"{base}{counter}"
 
     @staticmethod
-    def create_tokens(user_id):
+    def create_tokens(user):
         """Create access and refresh tokens for user."""
-        access_token = create_access_token(identity=str(user_id))
-        refresh_token = create_refresh_token(identity=str(user_id))
+        access_token = AuthService.issue_access_token(user)
+        refresh_token = create_refresh_token(identity=str(user['_id']))
         return access_token, refresh_token
 
+    @staticmethod
+    def issue_access_token(user):
+        """Create an access token carrying a snapshot of the user's auth state."""
+        return create_access_token(
+            identity=str(user['_id']),
+            additional_claims={'user': {
+                'pseudonym': user['pseudonym'],
+                'roles': user.get('roles', []),
+                'is_admin': user.get('is_admin', False),
+                'is_active': user.get('is_active', True)
+            }}
+        )
+
     @staticmethod
     def validate_email(email):
         """Validate email format."""
@@ -0,0 +1,118 @@
+"""Vectorized match scoring for listener candidates."""
+import numpy as np
+
+
+class BatchScorer:
+    """Score a whole candidate set of listeners in one vectorized pass.
+
+    The candidate set is turned into columnar arrays once; every call to
+    score() then evaluates the scoring rules for all listeners at the same time.
+    """
+
+    def __init__(self, listeners):
+        self.listeners = listeners
+
+        count = len(listeners)
+        self.static_bonus = np.empty(count, dtype=np.float64)
+        self.topics = []
+        self.interests = []
+        self.languages = []
+
+        for i, listener in enumerate(listeners):
+            # Listener-only components are precomputed on the document
+            static = listener.get('match_static') or BatchScorer.static_components(listener)
+            self.static_bonus[i] = static['bonus']
+            self.topics.append(frozenset(static['topics']))
+            self.interests.append(frozenset(static['interests']))
+            self.languages.append(frozenset(listener.get('languages', [])))
+
+    @staticmethod
+    def static_components(listener):
+        """
+        Compute the parts of a listener's score that do not depend on preferences.
+
+        Returns:
+            dict with:
+                - bonus: rating bonus + experience bonus
+                - topics: lowercased listener_topics
+                - interests: lowercased interests
+        """
+        rating = listener.get('listener_rating', 0.0) or 0.0
+        total_chats = listener.get('listener_total_chats', 0) or 0
+        return {
+            'bonus': max((rating - 3.0) * 10, 0) + min(total_chats / 10, 20),
+            'topics': sorted({t.lower() for t in listener.get('listener_topics', [])}),
+            'interests': sorted({i.lower() for i in listener.get('interests', [])})
+        }
+
+    def __len__(self):
+        return len(self.listeners)
+
+    def _membership_mask(self, column, value):
+        """Boolean mask of listeners whose set in column contains value."""
+        return np.fromiter((value in values for values in column), dtype=bool, count=len(column))
+
+    def score(self, preferences, rng=None, mask=None):
+        """
+        Calculate match scores for every listener.
+
+        Scoring system:
+        - Base score: 100
+        - Topic match (exact in listener_topics): +50
+        - Topic match (in interests): +25
+        - Language match: +30
+        - Rating bonus: (listener_rating - 3.0) * 10
+        - Experience bonus: min(listener_total_chats / 10, 20)
+        - Random factor: +/- 10 (for variety)
+
+        Args:
+            preferences: dict with optional topic and language
+            rng: numpy Generator used for the random factor; pass a seeded
+                generator (np.random.default_rng(seed)) for repeatable scores
+            mask: optional boolean array; only listeners where it is True are scored
+
+        Returns:
+            int64 array of scores (listeners excluded by mask score as the int64 minimum)
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+
+        count = len(self.listeners)
+        scores = np.full(count, 100.0)
+
+        topic = preferences.get('topic')
+        if topic:
+            topic = topic.lower()
+            topic_hits = self._membership_mask(self.topics, topic)
+            interest_hits = self._membership_mask(self.interests, topic) & ~topic_hits
+            scores += topic_hits * 50.0 + interest_hits * 25.0
+
+        language = preferences.get('language')
+        if language:
+            scores += self._membership_mask(self.languages, language) * 30.0
+
+        scores += self.static_bonus
+        scores += rng.integers(-10, 10, size=count, endpoint=True)
+
+        result = np.trunc(scores).astype(np.int64)
+        if mask is not None:
+            result[~mask] = np.iinfo(np.int64).min
+        return result
+
+    @staticmethod
+    def top_k(scores, k=3, mask=None):
+        """
+        Get indexes of the k highest scores, best first.
+
+        Uses argpartition so only the k winners are sorted.
+        """
+        candidates = np.arange(len(scores)) if mask is None else np.flatnonzero(mask)
+        if len(candidates) == 0:
+            return []
+
+        if len(candidates) > k:
+            part = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = candidates[part]
+
+        order = np.argsort(-scores[candidates], kind='stable')
+        return candidates[order].tolist()
@@ -0,0 +1,75 @@
+"""Pooled, cached client for Google's userinfo endpoint."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from .metrics import Metrics
+
+
+class GoogleUserInfoClient:
+    """Fetch Google userinfo over a shared keep-alive connection pool.
+
+    Verified credentials are cached for a short TTL (keyed by a hash of the
+    credential), so repeated logins with the same credential skip the HTTP
+    call. The endpoint comes from GOOGLE_USERINFO_URL so a local stub
+    (scripts/google_userinfo_stub.py) can stand in for load tests.
+    """
+
+    CACHE_SIZE = 1024
+
+    _session = None
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _get_session():
+        if GoogleUserInfoClient._session is None:
+            pool_size = current_app.config['GOOGLE_HTTP_POOL_SIZE']
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            GoogleUserInfoClient._session = session
+        return GoogleUserInfoClient._session
+
+    @staticmethod
+    def fetch(credential):
+        """
+        Get userinfo for an access token credential.
+
+        Returns:
+            userinfo dict, or None if the provider rejected the credential
+        """
+        cache_key = hashlib.sha256(credential.encode('utf-8')).hexdigest()
+
+        with GoogleUserInfoClient._lock:
+            cached = GoogleUserInfoClient._cache.get(cache_key)
+            if cached and cached[0] > time.time():
+                Metrics.incr('google_userinfo.cache_hit')
+                return cached[1]
+
+        Metrics.incr('google_userinfo.cache_miss')
+        started = time.perf_counter()
+        response = GoogleUserInfoClient._get_session().get(
+            current_app.config['GOOGLE_USERINFO_URL'],
+            headers={'Authorization': f'Bearer {credential}'},
+            timeout=current_app.config['GOOGLE_HTTP_TIMEOUT_SECONDS']
+        )
+        Metrics.observe('google_userinfo.latency_ms', (time.perf_counter() - started) * 1000)
+
+        if response.status_code != 200:
+            return None
+
+        user_info = response.json()
+        ttl = current_app.config['GOOGLE_USERINFO_CACHE_SECONDS']
+
+        with GoogleUserInfoClient._lock:
+            GoogleUserInfoClient._cache[cache_key] = (time.time() + ttl, user_info)
+            GoogleUserInfoClient._cache.move_to_end(cache_key)
+            if len(GoogleUserInfoClient._cache) > GoogleUserInfoClient.CACHE_SIZE:
+                GoogleUserInfoClient._cache.popitem(last=False)
+
+        return user_info
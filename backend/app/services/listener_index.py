@@ -0,0 +1,201 @@
+"""Redis-backed index of available listeners for matching."""
+from redis.exceptions import RedisError
+from ..extensions import redis_client
+
+
+class ListenerIndex:
+    """Maintain Redis sets of available listener IDs keyed by language.
+
+    Keys:
+        - listeners:available              all available listeners
+        - listeners:available:lang:<lang>  available listeners speaking <lang>
+
+    Only hard filters are indexed: topic only adds to the match score, so
+    it cannot narrow the candidates.
+    """
+
+    KEY_ALL = 'listeners:available'
+    KEY_LANGUAGE = 'listeners:available:lang:{}'
+    KEY_READY = 'listeners:available:ready'
+
+    # Outside the listeners:available:* pattern, which rebuild() clears
+    REBUILD_LOCK_KEY = 'listener_index:rebuild_lock'
+    REBUILD_INTERVAL_SECONDS = 30
+
+    @staticmethod
+    def _keys_for(user_doc):
+        """Return every index key a listener document belongs to."""
+        keys = [ListenerIndex.KEY_ALL]
+        keys += [ListenerIndex.KEY_LANGUAGE.format(lang) for lang in user_doc.get('languages', [])]
+        return keys
+
+    @staticmethod
+    def is_indexable(user_doc):
+        """Check if a user document should be present in the index."""
+        return bool(user_doc) and \
+            'listener' in user_doc.get('roles', []) and \
+            user_doc.get('listener_availability') == 'available' and \
+            user_doc.get('is_active', True)
+
+    @staticmethod
+    def sync_user(user_doc, previous_doc=None):
+        """Add or remove a listener so the index reflects the given document.
+
+        previous_doc is the document before the change, used to drop the
+        listener from language/topic keys it no longer belongs to.
+        """
+        if not user_doc:
+            return
+
+        user_id = str(user_doc['_id'])
+        stale_keys = set(ListenerIndex._keys_for(previous_doc)) if previous_doc else set()
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            if ListenerIndex.is_indexable(user_doc):
+                keys = set(ListenerIndex._keys_for(user_doc))
+                for key in stale_keys - keys:
+                    pipe.srem(key, user_id)
+                for key in keys:
+                    pipe.sadd(key, user_id)
+            else:
+                for key in stale_keys | set(ListenerIndex._keys_for(user_doc)):
+                    pipe.srem(key, user_id)
+            pipe.execute()
+        except RedisError:
+            # Index drift is repaired by the next rebuild; never fail the write path
+            ListenerIndex.invalidate()
+
+    @staticmethod
+    def remove(user_doc):
+        """Remove a listener from every index key."""
+        if not user_doc:
+            return
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for key in ListenerIndex._keys_for(user_doc):
+                pipe.srem(key, str(user_doc['_id']))
+            pipe.execute()
+        except RedisError:
+            ListenerIndex.invalidate()
+
+    @staticmethod
+    def candidate_ids(language=None):
+        """
+        Get IDs of available listeners that can match the given filters.
+
+        Returns:
+            set of listener ID strings, or None if the index is not ready
+            (caller should fall back to MongoDB)
+        """
+        try:
+            if not redis_client.exists(ListenerIndex.KEY_READY):
+                return None
+
+            if language:
+                return redis_client.smembers(ListenerIndex.KEY_LANGUAGE.format(language))
+            return redis_client.smembers(ListenerIndex.KEY_ALL)
+        except RedisError:
+            return None
+
+    @staticmethod
+    def discard_stale(listener_ids):
+        """Drop IDs that MongoDB reported as no longer available."""
+        if not listener_ids:
+            return
+        try:
+            # Stale IDs may sit in any language/topic key, so force a rebuild
+            redis_client.srem(ListenerIndex.KEY_ALL, *listener_ids)
+            ListenerIndex.invalidate()
+        except RedisError:
+            pass
+
+    @staticmethod
+    def invalidate():
+        """Mark the index as not ready so readers fall back to MongoDB."""
+        try:
+            redis_client.delete(ListenerIndex.KEY_READY)
+        except RedisError:
+            pass
+
+    @staticmethod
+    def rebuild(collection):
+        """
+        Rebuild the whole index from MongoDB.
+
+        Args:
+            collection: users collection to read available listeners from
+
+        Returns:
+            number of listeners indexed
+        """
+        listeners = collection.find(
+            {
+                'roles': 'listener',
+                'listener_availability': 'available',
+                'is_active': True
+            },
+            {'languages': 1}
+        )
+
+        members = {}
+        for listener in listeners:
+            for key in ListenerIndex._keys_for(listener):
+                members.setdefault(key, set()).add(str(listener['_id']))
+
+        pipe = redis_client.pipeline(transaction=True)
+        for key in redis_client.scan_iter(match='listeners:available:*'):
+            pipe.delete(key)
+        pipe.delete(ListenerIndex.KEY_ALL)
+        for key, ids in members.items():
+            pipe.sadd(key, *ids)
+        pipe.set(ListenerIndex.KEY_READY, '1')
+        pipe.execute()
+
+        return len(members.get(ListenerIndex.KEY_ALL, ()))
+
+    @staticmethod
+    def rebuild_if_due(collection):
+        """
+        Rebuild the index unless a worker already did so in the last
+        REBUILD_INTERVAL_SECONDS (readers fall back to MongoDB meanwhile).
+
+        Returns:
+            number of listeners indexed, or None if skipped
+        """
+        if not redis_client.set(ListenerIndex.REBUILD_LOCK_KEY, '1', nx=True, ex=ListenerIndex.REBUILD_INTERVAL_SECONDS):
+            return None
+        return ListenerIndex.rebuild(collection)
+
+    @staticmethod
+    def check_consistency(collection, repair=True):
+        """
+        Compare the index against MongoDB.
+
+        Returns:
+            dict with IDs missing from the index and stale IDs in the index
+        """
+        expected = {
+            str(doc['_id'])
+            for doc in collection.find(
+                {
+                    'roles': 'listener',
+                    'listener_availability': 'available',
+                    'is_active': True
+                },
+                {'_id': 1}
+            )
+        }
+        indexed = redis_client.smembers(ListenerIndex.KEY_ALL)
+
+        result = {
+            'missing': sorted(expected - indexed),
+            'stale': sorted(indexed - expected),
+            'repaired': False
+        }
+
+        if repair and (result['missing'] or result['stale']):
+            ListenerIndex.rebuild(collection)
+            result['repaired'] = True
+
+        return result
@@ -0,0 +1,105 @@
+"""Short-lived cache of pre-filtered listener candidate lists."""
+from bson import json_util
+from redis.exceptions import RedisError
+from ..extensions import redis_client
+from .metrics import Metrics
+
+
+class MatchCache:
+    """Cache candidate lists keyed by normalized match filters.
+
+    Only the hard filters (language, minimum rating) decide which listeners
+    are candidates, so sharers with the same filters share one entry. Each
+    entry is registered under its language so a change to a listener only
+    invalidates entries that listener could appear in.
+    """
+
+    KEY = 'match_cache:entry:{}:{}'
+    REGISTRY_KEY = 'match_cache:lang:{}'
+    ANY = '*'
+    TTL_SECONDS = 5
+
+    # Fields needed to score and format a match
+    FIELDS = [
+        'pseudonym', 'bio', 'profile_picture_url', 'languages', 'listener_topics',
+        'interests', 'listener_rating', 'listener_total_chats', 'match_static'
+    ]
+
+    @staticmethod
+    def _normalize(filters):
+        """Return (language, min_rating) parts of the cache key."""
+        language = filters.get('language') or MatchCache.ANY
+        min_rating = filters.get('min_rating')
+        min_rating = MatchCache.ANY if min_rating is None else f'{float(min_rating):g}'
+        return language, min_rating
+
+    @staticmethod
+    def get(filters):
+        """
+        Get cached candidates for the filters.
+
+        Returns:
+            list of listener documents, or None on a miss
+        """
+        language, min_rating = MatchCache._normalize(filters)
+        try:
+            cached = redis_client.get(MatchCache.KEY.format(language, min_rating))
+        except RedisError:
+            cached = None
+
+        if cached is None:
+            Metrics.incr('match_cache.miss')
+            return None
+
+        Metrics.incr('match_cache.hit')
+        return json_util.loads(cached)
+
+    @staticmethod
+    def put(filters, listeners):
+        """Cache the candidate list for the filters."""
+        language, min_rating = MatchCache._normalize(filters)
+        key = MatchCache.KEY.format(language, min_rating)
+        registry = MatchCache.REGISTRY_KEY.format(language)
+
+        candidates = [
+            {'_id': listener['_id'], **{field: listener[field] for field in MatchCache.FIELDS if field in listener}}
+            for listener in listeners
+        ]
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.set(key, json_util.dumps(candidates), ex=MatchCache.TTL_SECONDS)
+            pipe.sadd(registry, key)
+            pipe.expire(registry, MatchCache.TTL_SECONDS)
+            pipe.execute()
+        except RedisError:
+            pass
+
+    @staticmethod
+    def invalidate_listener(user_doc, previous_doc=None):
+        """
+        Drop every cache entry a listener could appear in.
+
+        That is every entry for one of the listener's languages (before and
+        after the change) plus entries without a language filter.
+        """
+        if not user_doc:
+            return
+
+        languages = set(user_doc.get('languages', []))
+        if previous_doc:
+            languages |= set(previous_doc.get('languages', []))
+        languages.add(MatchCache.ANY)
+
+        registries = [MatchCache.REGISTRY_KEY.format(language) for language in languages]
+
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for registry in registries:
+                pipe.smembers(registry)
+            keys = set().union(*pipe.execute())
+
+            redis_client.delete(*keys, *registries)
+            Metrics.incr('match_cache.invalidations')
+        except RedisError:
+            pass
@@ -0,0 +1,257 @@
+"""Server-side matching queue with batched listener assignment."""
+import json
+import time
+import numpy as np
+from ..extensions import redis_client, socketio
+from ..models.user import User
+from ..models.chat import ChatSession
+from .batch_scorer import BatchScorer
+from .matching_service import MatchingService
+
+
+class MatchingQueue:
+    """Queue sharers and periodically assign listeners to the whole batch.
+
+    Queued requests live in a Redis hash (sharer ID -> JSON entry) so every
+    web worker can enqueue. A Redis lock makes sure only one worker starts
+    the assigner on each tick; since a slow pass can outlive the lock, each
+    sharer is also claimed (removed from the hash with HDEL) before a
+    listener is reserved, so overlapping passes never match a sharer twice.
+
+    Entries belong to the socket that queued them: they are removed when
+    it disconnects, and dropped by the assigner after
+    MATCH_QUEUE_ENTRY_TTL_SECONDS so a lost disconnect cannot leave an
+    offline sharer queued.
+    """
+
+    KEY = 'matching_queue:requests'
+    LOCK_KEY = 'matching_queue:assigner_lock'
+
+    # Removes an entry only if it still belongs to the given socket
+    _DEQUEUE_SID_SCRIPT = """
+    local entry = redis.call('HGET', KEYS[1], ARGV[1])
+    if entry and cjson.decode(entry)['sid'] == ARGV[2] then
+        return redis.call('HDEL', KEYS[1], ARGV[1])
+    end
+    return 0
+    """
+
+    entry_ttl_seconds = 600
+
+    @staticmethod
+    def enqueue(sharer, preferences, sid):
+        """
+        Add (or replace) a sharer's queued match request.
+
+        Args:
+            sharer: Sharer identity (_id, pseudonym, languages)
+            preferences: Raw match filters from the client
+            sid: Socket that queued the request
+
+        Returns:
+            (entry, error)
+        """
+        cleaned, error = MatchingService.clean_preferences(preferences)
+        if error:
+            return None, error
+
+        entry = {
+            'pseudonym': sharer['pseudonym'],
+            'languages': sharer.get('languages', []),
+            'preferences': cleaned,
+            'sid': sid,
+            'enqueued_at': time.time()
+        }
+        redis_client.hset(MatchingQueue.KEY, str(sharer['_id']), json.dumps(entry))
+        return entry, None
+
+    @staticmethod
+    def dequeue(sharer_id):
+        """Remove a sharer from the queue."""
+        redis_client.hdel(MatchingQueue.KEY, str(sharer_id))
+
+    @staticmethod
+    def dequeue_sid(sharer_id, sid):
+        """Remove a sharer's request if it was queued by this socket (on disconnect)."""
+        redis_client.eval(MatchingQueue._DEQUEUE_SID_SCRIPT, 1, MatchingQueue.KEY, str(sharer_id), sid)
+
+    @staticmethod
+    def _requeue(sharer_id, entry):
+        """Put a claimed sharer back, unless they re-enqueued meanwhile."""
+        redis_client.hsetnx(MatchingQueue.KEY, sharer_id, json.dumps(entry))
+
+    @staticmethod
+    def size():
+        """Number of sharers waiting."""
+        return redis_client.hlen(MatchingQueue.KEY)
+
+    @staticmethod
+    def _assign(sharer_ids, entries, scorer, rng=None):
+        """
+        Greedy global assignment of sharers to listeners.
+
+        Every (sharer, listener) pair is scored with the batch scorer and
+        pairs are taken best-first, skipping sharers or listeners that are
+        already assigned. Each sharer only needs its top len(sharer_ids)
+        listeners considered: the others can take at most len(sharer_ids) - 1.
+
+        Returns:
+            list of (sharer index, listener index, score)
+        """
+        listeners = scorer.listeners
+        candidates = []
+
+        for sharer_index, sharer_id in enumerate(sharer_ids):
+            preferences = entries[sharer_id]['preferences']
+            recent_partners = ChatSession.get_recent_partners(sharer_id, hours=24)
+            try:
+                eligible = np.fromiter(
+                    (
+                        listener['_id'] not in recent_partners
+                        and str(listener['_id']) != sharer_id
+                        and MatchingService._matches_filters(listener, preferences)
+                        for listener in listeners
+                    ),
+                    dtype=bool,
+                    count=len(listeners)
+                )
+                scores = scorer.score(preferences, rng=rng, mask=eligible)
+            except (TypeError, ValueError, KeyError):
+                # Malformed entry: skip it rather than fail the whole batch
+                continue
+
+            for listener_index in BatchScorer.top_k(scores, k=len(sharer_ids), mask=eligible):
+                candidates.append((int(scores[listener_index]), sharer_index, listener_index))
+
+        candidates.sort(key=lambda c: c[0], reverse=True)
+
+        assigned_sharers = set()
+        assigned_listeners = set()
+        assignments = []
+        for score, sharer_index, listener_index in candidates:
+            if sharer_index in assigned_sharers or listener_index in assigned_listeners:
+                continue
+            assigned_sharers.add(sharer_index)
+            assigned_listeners.add(listener_index)
+            assignments.append((sharer_index, listener_index, score))
+
+        return assignments
+
+    @staticmethod
+    def run_assignment(rng=None):
+        """
+        Run one assignment pass over every queued sharer.
+
+        Returns:
+            number of chat sessions created
+        """
+        raw_entries = redis_client.hgetall(MatchingQueue.KEY)
+        if not raw_entries:
+            return 0
+
+        entries = {}
+        cutoff = time.time() - MatchingQueue.entry_ttl_seconds
+        for sharer_id, raw_entry in raw_entries.items():
+            try:
+                entry = json.loads(raw_entry)
+                expired = entry['enqueued_at'] < cutoff
+                entry['preferences'], error = MatchingService.clean_preferences(entry['preferences'])
+            except (ValueError, TypeError, KeyError):
+                expired, error = False, 'Malformed queue entry'
+
+            if expired or error:
+                MatchingQueue.dequeue(sharer_id)
+                socketio.emit('match_queue_expired', {
+                    'reason': 'Your match request expired, please try again' if expired else error
+                }, room=sharer_id)
+                continue
+            entries[sharer_id] = entry
+
+        sharer_ids = list(entries)
+        if not sharer_ids:
+            return 0
+
+        listeners = User.find_available_listeners()
+        if not listeners:
+            return 0
+
+        scorer = BatchScorer(listeners)
+        created = 0
+
+        for sharer_index, listener_index, score in MatchingQueue._assign(sharer_ids, entries, scorer, rng):
+            sharer_id = sharer_ids[sharer_index]
+            entry = entries[sharer_id]
+
+            # Claim the sharer; another pass (or a dequeue) got there first if this fails
+            if not redis_client.hdel(MatchingQueue.KEY, sharer_id):
+                continue
+
+            # Sharer may have started a chat through /match/request-chat meanwhile
+            if ChatSession.find_active_by_user(sharer_id):
+                continue
+
+            # Listener may have been taken since the scan; sharer goes back in the queue
+            listener = User.reserve_listener(listeners[listener_index]['_id'])
+            if not listener:
+                MatchingQueue._requeue(sharer_id, entry)
+                continue
+
+            topic = entry['preferences'].get('topic')
+            try:
+                session = ChatSession.create(
+                    sharer_id=sharer_id,
+                    listener_id=listener['_id'],
+                    topic=topic,
+                    language=(entry.get('languages') or ['English'])[0]
+                )
+            except Exception:
+                User.release_listener(listener['_id'])
+                MatchingQueue._requeue(sharer_id, entry)
+                raise
+
+            created += 1
+
+            socketio.emit('chat_request', {
+                'session_id': str(session['_id']),
+                'sharer': {
+                    'id': sharer_id,
+                    'pseudonym': entry['pseudonym']
+                },
+                'topic': topic
+            }, room=str(listener['_id']))
+
+            socketio.emit('match_found', {
+                'session_id': str(session['_id']),
+                'listener': {
+                    'id': str(listener['_id']),
+                    'pseudonym': listener['pseudonym'],
+                    'profile_picture_url': listener.get('profile_picture_url')
+                },
+                'topic': topic,
+                'match_score': score,
+                'started_at': session['started_at'].isoformat(),
+                'status': 'active'
+            }, room=sharer_id)
+
+        return created
+
+    @staticmethod
+    def start_assigner(app):
+        """Start the background assigner loop for this worker."""
+        interval = app.config['MATCH_QUEUE_INTERVAL_MS'] / 1000.0
+        MatchingQueue.entry_ttl_seconds = app.config['MATCH_QUEUE_ENTRY_TTL_SECONDS']
+
+        def assigner_loop():
+            while True:
+                socketio.sleep(interval)
+                try:
+                    # Only one worker assigns per tick; the lock expires on its own
+                    # (sharer claims keep an overrunning pass safe)
+                    if not redis_client.set(MatchingQueue.LOCK_KEY, '1', nx=True, px=int(interval * 1000)):
+                        continue
+                    with app.app_context():
+                        MatchingQueue.run_assignment()
+                except Exception as e:
+                    app.logger.error(f'Matching queue assignment failed: {str(e)}')
+
+        socketio.start_background_task(assigner_loop)
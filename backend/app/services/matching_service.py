@@ -1,14 +1,48 @@
 """Matching service for connecting sharers with listeners."""
-import random
+import numpy as np
 from ..models.user import User
 from ..models.chat import ChatSession
+from .batch_scorer import BatchScorer
+from .match_cache import MatchCache
 
 
 class MatchingService:
     """Handle matching algorithm logic."""
 
+    MAX_FILTER_LENGTH = 100
+
     @staticmethod
-    def find_matches(sharer_id, preferences=None):
+    def clean_preferences(preferences):
+        """
+        Validate and coerce match filters sent by a client.
+
+        Args:
+            preferences: Raw filters (topic, language, preferred_min_rating)
+
+        Returns:
+            (preferences, error)
+        """
+        if not isinstance(preferences, dict):
+            return None, 'Invalid match preferences'
+
+        cleaned = {}
+        for field in ('topic', 'language'):
+            value = preferences.get(field)
+            if value is not None and (not isinstance(value, str) or len(value) > MatchingService.MAX_FILTER_LENGTH):
+                return None, f'{field} must be a string of at most {MatchingService.MAX_FILTER_LENGTH} characters'
+            cleaned[field] = value or None
+
+        min_rating = preferences.get('preferred_min_rating')
+        if min_rating is not None:
+            if isinstance(min_rating, bool) or not isinstance(min_rating, (int, float)) or not 0 <= min_rating <= 5:
+                return None, 'preferred_min_rating must be a number between 0 and 5'
+            min_rating = float(min_rating)
+        cleaned['preferred_min_rating'] = min_rating
+
+        return cleaned, None
+
+    @staticmethod
+    def find_matches(sharer_id, preferences=None, rng=None):
         """
         Find top 3 listener matches based on preferences.
 
@@ -18,6 +52,7 @@ class MatchingService:
                 - topic: str
                 - language: str
                 - preferred_min_rating: float
+            rng: optional numpy Generator for the score random factor
 
         Returns:
             list of matched listeners with scores
@@ -25,8 +60,16 @@ class MatchingService:
         if preferences is None:
             preferences = {}
 
-        # Get all available listeners
-        available_listeners = User.find_available_listeners()
+        # Get available listeners that pass the hard filters
+        filters = {}
+        if preferences.get('language'):
+            filters['language'] = preferences['language']
+        if preferences.get('preferred_min_rating') is not None:
+            filters['min_rating'] = preferences['preferred_min_rating']
+        available_listeners = MatchCache.get(filters)
+        if available_listeners is None:
+            available_listeners = User.find_available_listeners(filters)
+            MatchCache.put(filters, available_listeners)
 
         if not available_listeners:
             return []
@@ -34,35 +77,25 @@ class MatchingService:
         # Get recent chat partners (last 24 hours) to exclude
         recent_partners = ChatSession.get_recent_partners(sharer_id, hours=24)
 
-        # Filter and score listeners
-        scored_listeners = []
-
-        for listener in available_listeners:
-            listener_id = listener['_id']
-
-            # Skip if chatted recently
-            if listener_id in recent_partners:
-                continue
-
-            # Skip if listener is the sharer (same user)
-            if str(listener_id) == str(sharer_id):
-                continue
-
-            # Apply filters from preferences
-            if not MatchingService._matches_filters(listener, preferences):
-                continue
-
-            # Calculate match score
-            score = MatchingService._calculate_score(listener, preferences)
-
-            scored_listeners.append({
-                'listener': listener,
-                'score': score
-            })
-
-        # Sort by score and return top 3
-        scored_listeners.sort(key=lambda x: x['score'], reverse=True)
-        top_matches = scored_listeners[:3]
+        # Mask out recent partners, the sharer and listeners failing filters
+        eligible = np.fromiter(
+            (
+                listener['_id'] not in recent_partners
+                and str(listener['_id']) != str(sharer_id)
+                and MatchingService._matches_filters(listener, preferences)
+                for listener in available_listeners
+            ),
+            dtype=bool,
+            count=len(available_listeners)
+        )
+
+        # Score every candidate in one pass and keep the top 3
+        scorer = BatchScorer(available_listeners)
+        scores = scorer.score(preferences, rng=rng, mask=eligible)
+        top_matches = [
+            {'listener': available_listeners[i], 'score': int(scores[i])}
+            for i in BatchScorer.top_k(scores, k=3, mask=eligible)
+        ]
 
         # Format response
         return [
@@ -90,7 +123,7 @@ class MatchingService:
                 return False
 
         # Minimum rating filter
-        if 'preferred_min_rating' in preferences:
+        if preferences.get('preferred_min_rating') is not None:
             min_rating = preferences['preferred_min_rating']
             listener_rating = listener.get('listener_rating', 0.0)
             if listener_rating < min_rating:
@@ -99,50 +132,10 @@ class MatchingService:
         return True
 
     @staticmethod
-    def _calculate_score(listener, preferences):
-        """
-        Calculate match score for a listener.
-
-        Scoring system:
-        - Base score: 100
-        - Topic match (exact in listener_topics): +50
-        - Topic match (in interests): +25
-        - Language match: +30
-        - Rating bonus: (listener_rating - 3.0) * 10
-        - Experience bonus: min(listener_total_chats / 10, 20)
-        - Random factor: +/- 10 (for variety)
+    def _calculate_score(listener, preferences, rng=None):
         """
-        score = 100
-
-        # Topic matching
-        if 'topic' in preferences and preferences['topic']:
-            topic = preferences['topic'].lower()
-            listener_topics = [t.lower() for t in listener.get('listener_topics', [])]
-            listener_interests = [i.lower() for i in listener.get('interests', [])]
-
-            if topic in listener_topics:
-                score += 50  # Exact topic match
-            elif topic in listener_interests:
-                score += 25  # Interest match
+        Calculate match score for a single listener.
 
-        # Language matching
-        if 'language' in preferences and preferences['language']:
-            listener_languages = listener.get('languages', [])
-            if preferences['language'] in listener_languages:
-                score += 30
-
-        # Rating bonus
-        listener_rating = listener.get('listener_rating', 0.0)
-        rating_bonus = (listener_rating - 3.0) * 10
-        score += max(rating_bonus, 0)  # Only positive bonus
-
-        # Experience bonus
-        total_chats = listener.get('listener_total_chats', 0)
-        experience_bonus = min(total_chats / 10, 20)
-        score += experience_bonus
-
-        # Random factor for variety
-        random_factor = random.randint(-10, 10)
-        score += random_factor
-
-        return int(score)
+        See BatchScorer.score for the scoring rules.
+        """
+        return int(BatchScorer([listener]).score(preferences, rng=rng)[0])
@@ -0,0 +1,106 @@
+"""Language-partitioned matching workers running in separate processes."""
+import json
+import time
+import uuid
+import zlib
+from flask import current_app
+from ..extensions import redis_client
+from .matching_service import MatchingService
+from .metrics import Metrics
+
+
+class MatchingWorkers:
+    """Dispatch find_matches to worker processes over Redis lists.
+
+    Requests are partitioned by language (or by the whole preference key when
+    no language is given), so each worker keeps hot, similar candidate sets
+    and scoring CPU runs outside the web process. Workers reply with
+    {'matches': [...]} or, if matching failed, {'error': ...} so the web
+    tier falls back immediately instead of waiting out the timeout.
+    Jobs carry a deadline (the web tier's timeout) and workers skip expired
+    ones; job lists are trimmed to MAX_QUEUED_JOBS and expire when no
+    worker drains them.
+    The worker processes are started by scripts/run_match_workers.py.
+    """
+
+    JOB_KEY = 'match_workers:jobs:{}'
+    REPLY_KEY = 'match_workers:reply:{}'
+    REPLY_TTL_SECONDS = 30
+    JOBS_TTL_SECONDS = 60
+    MAX_QUEUED_JOBS = 1000
+
+    @staticmethod
+    def partition_for(preferences, partitions):
+        """Pick the worker partition for a set of preferences."""
+        key = preferences.get('language') or json.dumps(preferences, sort_keys=True)
+        return zlib.crc32(key.encode('utf-8')) % partitions
+
+    @staticmethod
+    def request_matches(sharer_id, preferences):
+        """
+        Run find_matches on a worker process and wait for the result.
+
+        Falls back to matching in this process if no worker replies in time.
+        """
+        partitions = current_app.config['MATCH_WORKER_PARTITIONS']
+        timeout = current_app.config['MATCH_WORKER_TIMEOUT_SECONDS']
+
+        request_id = uuid.uuid4().hex
+        job = {
+            'request_id': request_id,
+            'sharer_id': str(sharer_id),
+            'preferences': preferences,
+            'deadline': time.time() + timeout
+        }
+
+        partition = MatchingWorkers.partition_for(preferences, partitions)
+        job_key = MatchingWorkers.JOB_KEY.format(partition)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.lpush(job_key, json.dumps(job))
+        pipe.ltrim(job_key, 0, MatchingWorkers.MAX_QUEUED_JOBS - 1)
+        pipe.expire(job_key, MatchingWorkers.JOBS_TTL_SECONDS)
+        pipe.execute()
+
+        reply = redis_client.blpop(MatchingWorkers.REPLY_KEY.format(request_id), timeout=timeout)
+        if reply is None:
+            Metrics.incr('match_workers.timeouts')
+            return MatchingService.find_matches(sharer_id, preferences)
+
+        result = json.loads(reply[1])
+        if 'error' in result:
+            Metrics.incr('match_workers.errors')
+            return MatchingService.find_matches(sharer_id, preferences)
+
+        Metrics.incr('match_workers.replies')
+        return result['matches']
+
+    @staticmethod
+    def run_worker(app, partition):
+        """Serve match jobs for one partition until the process is stopped."""
+        job_key = MatchingWorkers.JOB_KEY.format(partition)
+
+        with app.app_context():
+            app.logger.info(f'Matching worker listening on partition {partition}')
+            while True:
+                item = redis_client.brpop(job_key, timeout=1)
+                if item is None:
+                    continue
+
+                job = json.loads(item[1])
+                if job.get('deadline', float('inf')) < time.time():
+                    # The web tier has already fallen back to local matching
+                    Metrics.incr('match_workers.expired')
+                    continue
+
+                try:
+                    result = {'matches': MatchingService.find_matches(job['sharer_id'], job['preferences'])}
+                except Exception as e:
+                    app.logger.error(f'Matching worker failed: {str(e)}')
+                    # The web tier falls back to local matching
+                    result = {'error': str(e)}
+
+                reply_key = MatchingWorkers.REPLY_KEY.format(job['request_id'])
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.rpush(reply_key, json.dumps(result))
+                pipe.expire(reply_key, MatchingWorkers.REPLY_TTL_SECONDS)
+                pipe.execute()
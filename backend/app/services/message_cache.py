@@ -0,0 +1,111 @@
+"""Redis cache of the most recent messages of each chat session."""
+from bson import json_util
+from redis.exceptions import RedisError
+from ..extensions import redis_client
+from .metrics import Metrics
+
+
+# KEYS[1] = message list, KEYS[2] = meta hash; ARGV = message JSON, size
+APPEND_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return 0
+end
+redis.call('RPUSH', KEYS[1], ARGV[1])
+redis.call('LTRIM', KEYS[1], -tonumber(ARGV[2]), -1)
+redis.call('HINCRBY', KEYS[2], 'count', 1)
+redis.call('EXPIRE', KEYS[1], redis.call('TTL', KEYS[2]))
+return 1
+"""
+
+
+class RecentMessageCache:
+    """The last SIZE messages of every active session, kept in a Redis list.
+
+    A session's cache is created empty (and therefore complete) when the
+    session starts, filled as messages are sent and deleted when the session
+    ends. The meta hash holds the session's total message count, so the
+    first page of history, and whether older messages exist, can be answered
+    without MongoDB. Sessions without a meta hash (started before the cache
+    existed, or dropped after a Redis error) are a miss and read from MongoDB.
+    """
+
+    LIST_KEY = 'chat:recent:{}'
+    META_KEY = 'chat:recent:{}:meta'
+    SIZE = 50
+    TTL_SECONDS = 24 * 3600  # Same lifetime as the session's messages
+
+    FIELDS = ('_id', 'sender_id', 'sender_role', 'content', 'sent_at')
+
+    _append = None
+
+    @staticmethod
+    def init_session(session_id):
+        """Start an empty, complete cache for a new session."""
+        try:
+            meta_key = RecentMessageCache.META_KEY.format(session_id)
+            redis_client.hset(meta_key, 'count', 0)
+            redis_client.expire(meta_key, RecentMessageCache.TTL_SECONDS)
+        except RedisError:
+            pass  # Session history is read from MongoDB instead
+
+    @staticmethod
+    def append(message_doc):
+        """Add a sent message to its session's cache (if the cache is live)."""
+        session_id = message_doc['chat_session_id']
+        cached = {field: message_doc[field] for field in RecentMessageCache.FIELDS}
+
+        try:
+            if RecentMessageCache._append is None:
+                RecentMessageCache._append = redis_client.register_script(APPEND_SCRIPT)
+            RecentMessageCache._append(
+                keys=[RecentMessageCache.LIST_KEY.format(session_id), RecentMessageCache.META_KEY.format(session_id)],
+                args=[json_util.dumps(cached), RecentMessageCache.SIZE]
+            )
+        except RedisError:
+            # A cache missing this message would serve wrong history; drop it
+            RecentMessageCache.clear(session_id)
+
+    @staticmethod
+    def get_page(session_id, limit):
+        """
+        Get the latest messages of a session from the cache.
+
+        Args:
+            session_id: Chat session ID
+            limit: Page size
+
+        Returns:
+            (messages in chronological order, has_more), or None on a miss
+        """
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hget(RecentMessageCache.META_KEY.format(session_id), 'count')
+            pipe.lrange(RecentMessageCache.LIST_KEY.format(session_id), -limit, -1)
+            count, entries = pipe.execute()
+        except RedisError:
+            return None
+
+        if count is None:
+            Metrics.incr('message_cache.miss')
+            return None
+
+        count = int(count)
+        if len(entries) < min(limit, count):
+            # Page reaches past what the cache holds
+            Metrics.incr('message_cache.miss')
+            return None
+
+        Metrics.incr('message_cache.hit')
+        messages = [json_util.loads(entry) for entry in entries]
+        return messages, count > len(messages)
+
+    @staticmethod
+    def clear(session_id):
+        """Drop a session's cache."""
+        try:
+            redis_client.delete(
+                RecentMessageCache.LIST_KEY.format(session_id),
+                RecentMessageCache.META_KEY.format(session_id)
+            )
+        except RedisError:
+            pass
@@ -0,0 +1,216 @@
+"""Write-behind persistence for chat messages."""
+import atexit
+import os
+import socket
+import threading
+import time
+import uuid
+from bson import json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+from ..extensions import redis_client, socketio
+from ..models.message import Message
+from .metrics import Metrics
+
+
+class MessageWriter:
+    """Buffer chat messages in memory and insert them in batches.
+
+    Messages get their ObjectId up front (Message.build), so they can be
+    emitted before they are stored. Each worker flushes its buffer with one
+    unordered insert_many every MESSAGE_FLUSH_INTERVAL_MS, or sooner once
+    MESSAGE_FLUSH_BATCH_SIZE messages are waiting, and once more at exit.
+
+    With the journal enabled every buffered message is also appended to
+    this worker's own Redis stream and deleted from it after its batch is
+    stored. Workers record a heartbeat in a shared hash on every flush
+    tick; the journal of a worker whose heartbeat is older than
+    JOURNAL_STALE_SECONDS (it died with a full buffer) is claimed by one
+    live worker (HDEL) and replayed. Writes are idempotent because the _id
+    is already set: duplicate inserts are ignored, and bucket appends skip
+    messages already stored. Without the journal, a crash loses at most
+    one flush interval.
+
+    Failed batches are put back at the front of the buffer, which is capped
+    at MESSAGE_BUFFER_LIMIT messages: beyond it the oldest are dropped
+    (their journal entries are kept, so they are replayed on restart).
+    """
+
+    JOURNAL_KEY = 'messages:journal:{}'
+    HEARTBEATS_KEY = 'messages:journal:heartbeats'
+    JOURNAL_STALE_SECONDS = 30
+    REPLAY_CHUNK = 500
+
+    _buffer = []  # (message_doc, journal entry ID or None)
+    _lock = threading.Lock()
+    _wake = threading.Event()
+    _batch_size = 200
+    _buffer_limit = 10000
+    _journal = False
+    _worker_id = f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}'
+
+    @staticmethod
+    def submit(message_doc):
+        """Queue a message built with Message.build for insertion."""
+        entry_id = None
+        if MessageWriter._journal:
+            try:
+                entry_id = redis_client.xadd(
+                    MessageWriter.JOURNAL_KEY.format(MessageWriter._worker_id),
+                    {'doc': json_util.dumps(message_doc)}
+                )
+            except Exception:
+                # Without a journal entry the message is not crash-safe; store it now
+                Metrics.incr('message_writer.journal_error')
+                Message.save_many([message_doc])
+                return
+
+        with MessageWriter._lock:
+            MessageWriter._buffer.append((message_doc, entry_id))
+            pending = len(MessageWriter._buffer)
+
+        Metrics.gauge('message_writer.buffered', pending)
+        if pending >= MessageWriter._batch_size:
+            MessageWriter._wake.set()
+
+    @staticmethod
+    def flush():
+        """
+        Insert every buffered message.
+
+        Returns:
+            Number of messages stored
+        """
+        with MessageWriter._lock:
+            batch, MessageWriter._buffer = MessageWriter._buffer, []
+
+        if not batch:
+            return 0
+
+        started = time.perf_counter()
+        failed = set()
+        try:
+            Message.save_many([doc for doc, _ in batch])
+        except BulkWriteError as e:
+            if Message.bucket_size:
+                # Errors refer to bucket operations; retry all (appended messages are skipped)
+                failed = set(range(len(batch)))
+            else:
+                # Duplicate keys mean the message is already stored (journal replay)
+                failed = {error['index'] for error in e.details['writeErrors'] if error['code'] != 11000}
+        except PyMongoError:
+            failed = set(range(len(batch)))
+
+        if failed:
+            Metrics.incr('message_writer.failed', len(failed))
+            with MessageWriter._lock:
+                MessageWriter._buffer[:0] = [batch[i] for i in sorted(failed)]
+                overflow = len(MessageWriter._buffer) - MessageWriter._buffer_limit
+                if overflow > 0:
+                    del MessageWriter._buffer[:overflow]
+            if overflow > 0:
+                Metrics.incr('message_writer.dropped', overflow)
+
+        stored = [entry_id for i, (_, entry_id) in enumerate(batch) if i not in failed and entry_id]
+        if stored:
+            try:
+                redis_client.xdel(MessageWriter.JOURNAL_KEY.format(MessageWriter._worker_id), *stored)
+            except Exception:
+                pass  # Replayed later as harmless duplicates
+
+        Metrics.observe('message_writer.batch_size', len(batch))
+        Metrics.observe('message_writer.flush_latency_ms', (time.perf_counter() - started) * 1000)
+        Metrics.gauge('message_writer.buffered', len(MessageWriter._buffer))
+        return len(batch) - len(failed)
+
+    @staticmethod
+    def heartbeat():
+        """Mark this worker's journal as live."""
+        redis_client.hset(MessageWriter.HEARTBEATS_KEY, MessageWriter._worker_id, time.time())
+
+    @staticmethod
+    def replay():
+        """
+        Store messages left in the journals of workers that stopped.
+
+        Returns:
+            Number of journal entries replayed
+        """
+        replayed = 0
+        cutoff = time.time() - MessageWriter.JOURNAL_STALE_SECONDS
+        for worker_id, last_seen in redis_client.hgetall(MessageWriter.HEARTBEATS_KEY).items():
+            if worker_id == MessageWriter._worker_id or float(last_seen) >= cutoff:
+                continue
+            # Claim the journal so only one worker replays it
+            if not redis_client.hdel(MessageWriter.HEARTBEATS_KEY, worker_id):
+                continue
+            try:
+                replayed += MessageWriter._replay_journal(MessageWriter.JOURNAL_KEY.format(worker_id))
+            except Exception:
+                # Release the claim so the journal is retried
+                redis_client.hsetnx(MessageWriter.HEARTBEATS_KEY, worker_id, last_seen)
+                raise
+
+        Metrics.incr('message_writer.replayed', replayed)
+        return replayed
+
+    @staticmethod
+    def _replay_journal(journal_key):
+        """Store every entry of one journal, then delete it."""
+        replayed = 0
+        start = '-'
+        while True:
+            entries = redis_client.xrange(journal_key, min=start, count=MessageWriter.REPLAY_CHUNK)
+            if not entries:
+                break
+
+            docs = [json_util.loads(fields['doc']) for _, fields in entries]
+            try:
+                Message.save_many(docs)
+            except BulkWriteError as e:
+                if any(error['code'] != 11000 for error in e.details['writeErrors']):
+                    raise
+
+            replayed += len(entries)
+            start = f'({entries[-1][0]}'
+
+        redis_client.delete(journal_key)
+        return replayed
+
+    @staticmethod
+    def start_writer(app):
+        """Replay stale journals and start the flush loop for this worker."""
+        interval = app.config['MESSAGE_FLUSH_INTERVAL_MS'] / 1000.0
+        MessageWriter._batch_size = app.config['MESSAGE_FLUSH_BATCH_SIZE']
+        MessageWriter._buffer_limit = app.config['MESSAGE_BUFFER_LIMIT']
+        MessageWriter._journal = app.config['MESSAGE_JOURNAL_ENABLED']
+
+        def maintain_journal():
+            try:
+                MessageWriter.heartbeat()
+                replayed = MessageWriter.replay()
+                if replayed:
+                    app.logger.info(f'Replayed {replayed} journaled messages')
+            except Exception as e:
+                app.logger.error(f'Message journal replay failed: {str(e)}')
+
+        if MessageWriter._journal:
+            maintain_journal()
+
+        def flush_loop():
+            # Heartbeat (and look for stale journals) well within the stale window
+            maintenance_interval = MessageWriter.JOURNAL_STALE_SECONDS / 3.0
+            last_maintenance = time.time()
+            while True:
+                MessageWriter._wake.wait(interval)
+                MessageWriter._wake.clear()
+                try:
+                    MessageWriter.flush()
+                except Exception as e:
+                    app.logger.error(f'Message flush failed: {str(e)}')
+
+                if MessageWriter._journal and time.time() - last_maintenance >= maintenance_interval:
+                    last_maintenance = time.time()
+                    maintain_journal()
+
+        atexit.register(MessageWriter.flush)
+        socketio.start_background_task(flush_loop)
@@ -0,0 +1,60 @@
+"""In-process metrics for caches, pools and background workers."""
+import threading
+
+
+class Metrics:
+    """Per-worker counters, gauges and timing summaries.
+
+    Values are kept in memory for the current process and exposed through
+    the admin metrics endpoint.
+    """
+
+    _lock = threading.Lock()
+    _counters = {}
+    _gauges = {}
+    _timings = {}
+
+    @staticmethod
+    def incr(name, amount=1):
+        """Increment a counter."""
+        with Metrics._lock:
+            Metrics._counters[name] = Metrics._counters.get(name, 0) + amount
+
+    @staticmethod
+    def gauge(name, value):
+        """Set a gauge to its current value."""
+        with Metrics._lock:
+            Metrics._gauges[name] = value
+
+    @staticmethod
+    def observe(name, value):
+        """Record one observation (e.g. a latency in ms or a batch size)."""
+        with Metrics._lock:
+            timing = Metrics._timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            timing['count'] += 1
+            timing['total'] += value
+            timing['max'] = max(timing['max'], value)
+
+    @staticmethod
+    def get(name, default=0):
+        """Get the current value of a counter."""
+        with Metrics._lock:
+            return Metrics._counters.get(name, default)
+
+    @staticmethod
+    def snapshot():
+        """Return a copy of every metric."""
+        with Metrics._lock:
+            timings = {
+                name: {
+                    'count': timing['count'],
+                    'avg': timing['total'] / timing['count'] if timing['count'] else 0.0,
+                    'max': timing['max']
+                }
+                for name, timing in Metrics._timings.items()
+            }
+            return {
+                'counters': dict(Metrics._counters),
+                'gauges': dict(Metrics._gauges),
+                'timings': timings
+            }
@@ -0,0 +1,143 @@
+"""Escalation of flagged messages through a Redis stream."""
+import os
+import socket
+import time
+from datetime import datetime
+from pymongo.errors import BulkWriteError
+from ..extensions import db, redis_client, socketio
+from .metrics import Metrics
+
+
+class ModerationEvents:
+    """Flagged-message events, appended on send and consumed in the background.
+
+    send_message only appends to the stream (one XADD). A consumer on every
+    worker reads the stream through a shared consumer group, so each event
+    is handled once: it is stored in moderation_events in batches (without
+    the message text) and pushed to the 'admins' Socket.IO room, then
+    acknowledged and deleted from the stream. Events are
+    stored with the stream entry ID as _id, so redelivery is harmless.
+    Entries left pending by a consumer that died are claimed by the others
+    once they have been idle for CLAIM_IDLE_MS.
+    """
+
+    STREAM = 'moderation:flagged'
+    GROUP = 'moderation-escalation'
+    ADMIN_ROOM = 'admins'
+    MAX_LEN = 100000
+    BATCH_SIZE = 100
+    BLOCK_MS = 1000
+    CLAIM_IDLE_MS = 60000
+
+    @staticmethod
+    def publish(message_doc, reason, sender_pseudonym):
+        """Append a flagged message to the escalation stream."""
+        try:
+            redis_client.xadd(ModerationEvents.STREAM, {
+                'message_id': str(message_doc['_id']),
+                'chat_session_id': str(message_doc['chat_session_id']),
+                'sender_id': str(message_doc['sender_id']),
+                'sender_pseudonym': sender_pseudonym,
+                'sender_role': message_doc['sender_role'],
+                'reason': reason,
+                'content': message_doc['content'],
+                'flagged_at': message_doc['sent_at'].isoformat()
+            }, maxlen=ModerationEvents.MAX_LEN, approximate=True)
+            Metrics.incr('moderation_events.published')
+        except Exception:
+            # The message itself is still stored as flagged
+            Metrics.incr('moderation_events.publish_error')
+
+    @staticmethod
+    def _ensure_group():
+        try:
+            redis_client.xgroup_create(ModerationEvents.STREAM, ModerationEvents.GROUP, id='0', mkstream=True)
+        except Exception as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    @staticmethod
+    def handle(entries):
+        """
+        Store and broadcast a batch of stream entries.
+
+        Returns:
+            Entry IDs to acknowledge
+        """
+        if not entries:
+            return []
+
+        records = [{
+            '_id': entry_id,
+            'message_id': fields['message_id'],
+            'chat_session_id': fields['chat_session_id'],
+            'sender_id': fields['sender_id'],
+            'sender_role': fields['sender_role'],
+            'reason': fields['reason'],
+            'flagged_at': datetime.fromisoformat(fields['flagged_at']),
+            'received_at': datetime.utcnow(),
+            'status': 'open'
+        } for entry_id, fields in entries]
+
+        try:
+            db.moderation_events.insert_many(records, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate keys are events already stored before a redelivery
+            if any(error['code'] != 11000 for error in e.details['writeErrors']):
+                raise
+
+        for entry_id, fields in entries:
+            socketio.emit('message_flagged', {
+                'event_id': entry_id,
+                'message_id': fields['message_id'],
+                'session_id': fields['chat_session_id'],
+                'sender_pseudonym': fields['sender_pseudonym'],
+                'reason': fields['reason'],
+                'content': fields['content'],
+                'flagged_at': fields['flagged_at']
+            }, room=ModerationEvents.ADMIN_ROOM)
+
+        # Entry IDs start with their creation time in ms
+        oldest_ms = int(entries[0][0].split('-')[0])
+        Metrics.observe('moderation_events.batch_size', len(entries))
+        Metrics.observe('moderation_events.lag_ms', time.time() * 1000 - oldest_ms)
+        return [entry_id for entry_id, _ in entries]
+
+    @staticmethod
+    def start_consumer(app):
+        """Consume the escalation stream in the background on this worker."""
+        consumer = f'{socket.gethostname()}-{os.getpid()}'
+
+        def consume():
+            while True:
+                try:
+                    ModerationEvents._ensure_group()
+
+                    while True:
+                        # Take over entries a dead consumer left unacknowledged
+                        claimed = redis_client.xautoclaim(
+                            ModerationEvents.STREAM, ModerationEvents.GROUP, consumer,
+                            min_idle_time=ModerationEvents.CLAIM_IDLE_MS, count=ModerationEvents.BATCH_SIZE
+                        )[1]
+                        entries = [entry for entry in claimed if entry and entry[1]]
+
+                        if not entries:
+                            response = redis_client.xreadgroup(
+                                ModerationEvents.GROUP, consumer, {ModerationEvents.STREAM: '>'},
+                                count=ModerationEvents.BATCH_SIZE, block=ModerationEvents.BLOCK_MS
+                            )
+                            entries = response[0][1] if response else []
+
+                        with app.app_context():
+                            acknowledged = ModerationEvents.handle(entries)
+                        if acknowledged:
+                            # Handled entries are deleted so message content is not retained
+                            pipe = redis_client.pipeline(transaction=False)
+                            pipe.xack(ModerationEvents.STREAM, ModerationEvents.GROUP, *acknowledged)
+                            pipe.xdel(ModerationEvents.STREAM, *acknowledged)
+                            pipe.execute()
+                except Exception as e:
+                    app.logger.error(f'Moderation escalation error: {str(e)}')
+                    socketio.sleep(1)
+
+        socketio.start_background_task(consume)
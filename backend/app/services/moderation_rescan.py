@@ -0,0 +1,247 @@
+"""Retroactive moderation of stored messages with a process pool."""
+import multiprocessing
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pymongo import UpdateOne
+from ..extensions import db, redis_client
+from ..models.message import Message
+from .moderation_events import ModerationEvents
+from .moderation_service import ModerationService
+
+
+class ModerationRescan:
+    """Re-run current moderation rules over live (unexpired) messages.
+
+    Admins enqueue a job; a rescan worker (scripts/run_moderation_rescan.py)
+    streams messages with a batched cursor, moderates them in chunks across
+    a process pool and applies the results with bulk writes: blocked
+    messages are removed and flagged ones flagged, as remove_message and
+    flag_message would. Messages flagged before (even if an admin has
+    since approved them) are not flagged again; newly flagged ones are
+    escalated to admins like live ones. Progress is kept in a Redis hash
+    per job and counts only messages actually changed.
+    """
+
+    QUEUE_KEY = 'moderation_rescan:jobs'
+    ACTIVE_KEY = 'moderation_rescan:active'
+    JOB_KEY = 'moderation_rescan:job:{}'
+    JOB_TTL_SECONDS = 7 * 24 * 3600
+    ACTIVE_TTL_SECONDS = 3600
+
+    CHUNK_SIZE = 500
+    CURSOR_BATCH_SIZE = 2000
+
+    @staticmethod
+    def enqueue(admin_id):
+        """
+        Queue a rescan job.
+
+        Returns:
+            (job_id, error)
+        """
+        job_id = uuid.uuid4().hex
+        if not redis_client.set(ModerationRescan.ACTIVE_KEY, job_id, nx=True, ex=ModerationRescan.ACTIVE_TTL_SECONDS):
+            return None, 'A rescan is already queued or running'
+
+        job_key = ModerationRescan.JOB_KEY.format(job_id)
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.hset(job_key, mapping={
+            'status': 'queued',
+            'requested_by': str(admin_id),
+            'requested_at': datetime.utcnow().isoformat()
+        })
+        pipe.expire(job_key, ModerationRescan.JOB_TTL_SECONDS)
+        pipe.lpush(ModerationRescan.QUEUE_KEY, job_id)
+        pipe.execute()
+        return job_id, None
+
+    @staticmethod
+    def get_progress(job_id):
+        """Get a job's progress, or None if unknown."""
+        progress = redis_client.hgetall(ModerationRescan.JOB_KEY.format(job_id))
+        if not progress:
+            return None
+
+        for field in ('total', 'scanned', 'flagged', 'removed'):
+            if field in progress:
+                progress[field] = int(progress[field])
+        if 'messages_per_second' in progress:
+            progress['messages_per_second'] = float(progress['messages_per_second'])
+        return progress
+
+    @staticmethod
+    def _update(job_id, **fields):
+        job_key = ModerationRescan.JOB_KEY.format(job_id)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(job_key, mapping={key: str(value) for key, value in fields.items()})
+        pipe.expire(ModerationRescan.ACTIVE_KEY, ModerationRescan.ACTIVE_TTL_SECONDS)
+        pipe.execute()
+
+    # Fields ModerationEvents.publish needs
+    EVENT_PROJECTION = {'chat_session_id': 1, 'sender_id': 1, 'sender_role': 1, 'content': 1, 'sent_at': 1}
+
+    # Never flagged before: messages an admin approved from the review
+    # queue are also 'approved' but keep is_flagged
+    UNFLAGGED = {'is_flagged': {'$ne': True}, 'moderation_status': 'approved'}
+
+    @staticmethod
+    def _apply_document_verdicts(results):
+        """
+        Apply verdicts to individually stored messages with bulk writes.
+
+        Returns:
+            (number removed, newly flagged message docs with their reasons)
+        """
+        removals = [
+            UpdateOne({'_id': message_id, 'moderation_status': {'$ne': 'removed'}}, {'$set': {'moderation_status': 'removed'}})
+            for message_id, status, _ in results if status == 'blocked'
+        ]
+        removed = Message.collection.bulk_write(removals, ordered=False).modified_count if removals else 0
+
+        reasons = {message_id: reason for message_id, status, reason in results if status == 'flagged'}
+        if not reasons:
+            return removed, []
+
+        # Flag only messages that were never flagged, so reviews are not undone
+        to_flag = list(Message.collection.find(
+            {'_id': {'$in': list(reasons)}, **ModerationRescan.UNFLAGGED},
+            ModerationRescan.EVENT_PROJECTION
+        ))
+        if to_flag:
+            Message.collection.bulk_write([
+                UpdateOne(
+                    {'_id': doc['_id'], **ModerationRescan.UNFLAGGED},
+                    {'$set': {'is_flagged': True, 'moderation_status': 'flagged', 'flagged_reason': reasons[doc['_id']]}}
+                )
+                for doc in to_flag
+            ], ordered=False)
+        return removed, [(doc, reasons[doc['_id']]) for doc in to_flag]
+
+    @staticmethod
+    def _publish_flagged(flagged):
+        """Escalate newly flagged (message doc, reason) pairs to admins."""
+        if not flagged:
+            return
+        pseudonyms = {
+            user['_id']: user['pseudonym']
+            for user in db.users.find(
+                {'_id': {'$in': list({doc['sender_id'] for doc, _ in flagged})}},
+                {'pseudonym': 1}
+            )
+        }
+        for doc, reason in flagged:
+            ModerationEvents.publish(doc, reason, pseudonyms.get(doc['sender_id'], ''))
+
+    @staticmethod
+    def _chunks(cursor, extract):
+        """Yield lists of (message ID, content) pairs from a cursor."""
+        chunk = []
+        for doc in cursor:
+            for item in extract(doc):
+                chunk.append(item)
+                if len(chunk) >= ModerationRescan.CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def run(job_id, processes):
+        """Execute a rescan job (in the rescan worker process)."""
+        now = datetime.utcnow()
+        live = {'expires_at': {'$gt': now}, 'moderation_status': {'$ne': 'removed'}}
+        total = Message.collection.count_documents(live)
+        if Message.bucket_size:
+            total += sum(bucket['count'] for bucket in Message.bucket_collection.find(
+                {'expires_at': {'$gt': now}}, {'count': 1}
+            ))
+
+        started = time.perf_counter()
+        counts = {'scanned': 0, 'flagged': 0, 'removed': 0}
+        ModerationRescan._update(job_id, status='running', total=total, started_at=now.isoformat(), **counts)
+
+        def report():
+            elapsed = time.perf_counter() - started
+            rate = round(counts['scanned'] / elapsed, 1) if elapsed else 0.0
+            ModerationRescan._update(job_id, messages_per_second=rate, **counts)
+
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+            # Individually stored messages: verdicts applied with bulk writes
+            cursor = Message.collection.find(live, {'content': 1}).batch_size(ModerationRescan.CURSOR_BATCH_SIZE)
+            chunks = ModerationRescan._chunks(cursor, lambda doc: [(doc['_id'], doc['content'])])
+            for size, results in ModerationRescan._map(executor, chunks, processes * 2):
+                removed, flagged = ModerationRescan._apply_document_verdicts(results)
+                ModerationRescan._publish_flagged(flagged)
+                counts['scanned'] += size
+                counts['flagged'] += len(flagged)
+                counts['removed'] += removed
+                report()
+
+            if Message.bucket_size:
+                # Bucketed messages: hits are rare, apply them one by one
+                sent_after = now - Message.TTL
+                cursor = Message.bucket_collection.find(
+                    {'expires_at': {'$gt': now}},
+                    {'messages._id': 1, 'messages.content': 1, 'messages.sent_at': 1, 'messages.moderation_status': 1}
+                ).batch_size(ModerationRescan.CURSOR_BATCH_SIZE)
+                chunks = ModerationRescan._chunks(cursor, lambda bucket: [
+                    (msg['_id'], msg['content']) for msg in bucket['messages']
+                    if msg['sent_at'] > sent_after and msg.get('moderation_status') != 'removed'
+                ])
+                for size, results in ModerationRescan._map(executor, chunks, processes * 2):
+                    flagged = {}
+                    for message_id, status, reason in results:
+                        if status == 'blocked':
+                            Message.remove_message(message_id)
+                            counts['removed'] += 1
+                        elif Message.flag_message(message_id, reason):
+                            flagged[message_id] = reason
+
+                    # Flagged messages were moved out into individual documents
+                    if flagged:
+                        docs = Message.collection.find({'_id': {'$in': list(flagged)}}, ModerationRescan.EVENT_PROJECTION)
+                        ModerationRescan._publish_flagged([(doc, flagged[doc['_id']]) for doc in docs])
+                    counts['flagged'] += len(flagged)
+                    counts['scanned'] += size
+                    report()
+
+        report()
+        ModerationRescan._update(job_id, status='completed', finished_at=datetime.utcnow().isoformat())
+
+    @staticmethod
+    def _map(executor, chunks, window):
+        """Moderate chunks on the pool, keeping at most `window` in flight, in order."""
+        pending = deque()
+        for chunk in chunks:
+            pending.append((len(chunk), executor.submit(ModerationService.moderate_chunk, chunk)))
+            if len(pending) >= window:
+                size, future = pending.popleft()
+                yield size, future.result()
+        while pending:
+            size, future = pending.popleft()
+            yield size, future.result()
+
+    @staticmethod
+    def serve(app, processes):
+        """Wait for rescan jobs and run them until the process is stopped."""
+        with app.app_context():
+            app.logger.info(f'Moderation rescan worker ready ({processes} processes)')
+            while True:
+                item = redis_client.brpop(ModerationRescan.QUEUE_KEY, timeout=5)
+                if item is None:
+                    continue
+
+                job_id = item[1]
+                try:
+                    ModerationRescan.run(job_id, processes)
+                except Exception as e:
+                    app.logger.error(f'Moderation rescan {job_id} failed: {str(e)}')
+                    ModerationRescan._update(job_id, status='failed', error=str(e))
+                finally:
+                    # Release the lock only if it still belongs to this job
+                    if redis_client.get(ModerationRescan.ACTIVE_KEY) == job_id:
+                        redis_client.delete(ModerationRescan.ACTIVE_KEY)
@@ -1,9 +1,17 @@
 """Text moderation service with keyword filtering."""
 import re
+from .text_normalizer import TextNormalizer
 
 
 class ModerationService:
-    """Handle content moderation for messages."""
+    """Handle content moderation for messages.
+
+    Rules run on canonical forms of the message (see TextNormalizer), so
+    spacing, look-alike characters and leetspeak do not get around them.
+    Blocked patterns see the plain form, which keeps digits and '@' for
+    phone and email rules; flagged keywords are matched against the
+    case-folded form with leetspeak undone.
+    """
 
     # Blocked keywords and patterns
     BLOCKED_PATTERNS = [
@@ -29,6 +37,43 @@ class ModerationService:
         'better off dead'
     ]
 
+    # Cheap pre-checks for blocked patterns, by reason: the pattern can only
+    # match if the case-folded message contains one of these substrings.
+    # Patterns without hints always run.
+    BLOCKED_HINTS = {
+        'email address': ('@',),
+        'social media contact': ('whatsapp', 'telegram', 'snapchat', 'instagram', 'facebook', 'twitter'),
+        'meeting request': ('meet me', 'my address', 'come to', 'visit me'),
+    }
+
+    # Compiled rules in priority order (see compile_rules)
+    _blocked = []
+    _flagged = []
+
+    @staticmethod
+    def compile_rules():
+        """
+        Compile the rules once, in the order they are checked.
+
+        Call again after changing BLOCKED_PATTERNS, BLOCKED_HINTS or
+        FLAGGED_KEYWORDS.
+        """
+        ModerationService._blocked = [
+            (
+                re.compile(pattern, re.IGNORECASE),
+                ModerationService.BLOCKED_HINTS.get(reason),
+                {'status': 'blocked', 'reason': f'Contains {reason}'}
+            )
+            for pattern, reason in ModerationService.BLOCKED_PATTERNS
+        ]
+        ModerationService._flagged = [
+            (
+                TextNormalizer.normalize(keyword)[2],
+                {'status': 'flagged', 'reason': f'Contains concerning content: {keyword}'}
+            )
+            for keyword in ModerationService.FLAGGED_KEYWORDS
+        ]
+
     @staticmethod
     def moderate_message(content):
         """
@@ -42,23 +87,47 @@ class ModerationService:
         if not content:
             return {'status': 'blocked', 'reason': 'Empty message'}
 
-        content_lower = content.lower()
+        plain, folded, deobfuscated = TextNormalizer.normalize(content)
 
-        # Check blocked patterns
-        for pattern, reason in ModerationService.BLOCKED_PATTERNS:
-            if re.search(pattern, content, re.IGNORECASE):
-                return {'status': 'blocked', 'reason': f'Contains {reason}'}
+        # Check blocked patterns (skipping those whose hints are absent)
+        for pattern, hints, verdict in ModerationService._blocked:
+            if hints and not any(hint in folded for hint in hints):
+                continue
+            if pattern.search(plain):
+                return dict(verdict)
 
         # Check flagged keywords
-        for keyword in ModerationService.FLAGGED_KEYWORDS:
-            if keyword in content_lower:
-                return {'status': 'flagged', 'reason': f'Contains concerning content: {keyword}'}
+        for keyword, verdict in ModerationService._flagged:
+            if keyword in deobfuscated:
+                return dict(verdict)
 
         # All clear
         return {'status': 'approved', 'reason': None}
 
+    @staticmethod
+    def moderate_chunk(items):
+        """
+        Moderate a chunk of (message ID, content) pairs in a pool process.
+
+        Lives here rather than in moderation_rescan so spawned pool
+        processes can unpickle it without importing models (which need an
+        initialized database).
+
+        Returns:
+            (message ID, status, reason) for every message that is not approved
+        """
+        results = []
+        for message_id, content in items:
+            verdict = ModerationService.moderate_message(content)
+            if verdict['status'] != 'approved':
+                results.append((message_id, verdict['status'], verdict['reason']))
+        return results
+
     @staticmethod
     def is_enabled():
         """Check if moderation is enabled."""
         from flask import current_app
         return current_app.config.get('MODERATION_ENABLED', True)
+
+
+ModerationService.compile_rules()
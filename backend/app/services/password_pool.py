@@ -0,0 +1,45 @@
+"""Bounded worker pool for bcrypt hashing and verification."""
+import threading
+import time
+from eventlet import tpool
+from flask import current_app
+from .metrics import Metrics
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised when too many bcrypt operations are already pending."""
+
+
+class PasswordPool:
+    """Run bcrypt on eventlet's native thread pool instead of the event loop.
+
+    bcrypt releases the GIL, so running it through tpool keeps green threads
+    (live chats, sockets) responsive while a hash is computed. The number of
+    pending operations is bounded; past the limit callers get
+    PasswordPoolSaturated immediately so routes can shed load with a 503.
+    Thread count follows eventlet's EVENTLET_THREADPOOL_SIZE.
+    """
+
+    _lock = threading.Lock()
+    _pending = 0
+
+    @staticmethod
+    def run(fn, *args):
+        """Execute fn(*args) on the pool and return its result."""
+        max_pending = current_app.config.get('BCRYPT_MAX_PENDING', 32)
+
+        with PasswordPool._lock:
+            if PasswordPool._pending >= max_pending:
+                Metrics.incr('bcrypt.rejected')
+                raise PasswordPoolSaturated()
+            PasswordPool._pending += 1
+            Metrics.gauge('bcrypt.pending', PasswordPool._pending)
+
+        started = time.perf_counter()
+        try:
+            return tpool.execute(fn, *args)
+        finally:
+            with PasswordPool._lock:
+                PasswordPool._pending -= 1
+                Metrics.gauge('bcrypt.pending', PasswordPool._pending)
+            Metrics.observe('bcrypt.latency_ms', (time.perf_counter() - started) * 1000)
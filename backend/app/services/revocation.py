@@ -0,0 +1,95 @@
+"""Revoked (banned/deactivated) users mirrored in memory on every worker."""
+import threading
+import time
+from ..extensions import redis_client, socketio
+from .metrics import Metrics
+
+
+class RevocationFeed:
+    """Keep an in-memory copy of the Redis set of revoked user IDs.
+
+    Bans add the user to the Redis set and publish on a channel; each worker
+    applies published changes immediately and re-reads the whole set every
+    resync interval, which bounds how long a missed message can go unnoticed.
+    """
+
+    KEY = 'revoked_users'
+    CHANNEL = 'revoked_users:feed'
+
+    _revoked = set()
+    _synced_at = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def revoke(user_id):
+        """Mark a user as revoked on every worker."""
+        user_id = str(user_id)
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.sadd(RevocationFeed.KEY, user_id)
+        pipe.publish(RevocationFeed.CHANNEL, f'+{user_id}')
+        pipe.execute()
+        RevocationFeed._apply(f'+{user_id}')
+
+    @staticmethod
+    def restore(user_id):
+        """Clear a user's revocation on every worker."""
+        user_id = str(user_id)
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.srem(RevocationFeed.KEY, user_id)
+        pipe.publish(RevocationFeed.CHANNEL, f'-{user_id}')
+        pipe.execute()
+        RevocationFeed._apply(f'-{user_id}')
+
+    @staticmethod
+    def is_revoked(user_id):
+        """
+        Check if a user is revoked.
+
+        Answered from memory once the mirror has synced; before that the
+        Redis set is queried directly.
+        """
+        if RevocationFeed._synced_at is None:
+            return bool(redis_client.sismember(RevocationFeed.KEY, str(user_id)))
+        return str(user_id) in RevocationFeed._revoked
+
+    @staticmethod
+    def _apply(change):
+        with RevocationFeed._lock:
+            if change.startswith('+'):
+                RevocationFeed._revoked.add(change[1:])
+            else:
+                RevocationFeed._revoked.discard(change[1:])
+
+    @staticmethod
+    def _resync():
+        members = redis_client.smembers(RevocationFeed.KEY)
+        with RevocationFeed._lock:
+            RevocationFeed._revoked = set(members)
+            RevocationFeed._synced_at = time.time()
+        Metrics.gauge('revocation.size', len(members))
+
+    @staticmethod
+    def start_listener(app):
+        """Mirror the revocation set and follow the feed in the background."""
+        resync_seconds = app.config['REVOCATION_RESYNC_SECONDS']
+
+        def listen():
+            while True:
+                try:
+                    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(RevocationFeed.CHANNEL)
+                    RevocationFeed._resync()
+
+                    while True:
+                        message = pubsub.get_message(timeout=1.0)
+                        if message:
+                            RevocationFeed._apply(message['data'])
+                        if time.time() - RevocationFeed._synced_at >= resync_seconds:
+                            RevocationFeed._resync()
+                except Exception as e:
+                    # Until the mirror resyncs, answer from Redis directly
+                    RevocationFeed._synced_at = None
+                    app.logger.error(f'Revocation feed error: {str(e)}')
+                    socketio.sleep(1)
+
+        socketio.start_background_task(listen)
@@ -1,5 +1,5 @@
 """Socket.IO chat event handlers."""
-from flask import request
+from flask import request, current_app
 from flask_socketio import emit, join_room, leave_room
 from flask_jwt_extended import decode_token
 from ..extensions import socketio
@@ -7,6 +7,12 @@ from ..models.user import User
 from ..models.chat import ChatSession
 from ..models.message import Message
 from ..services.moderation_service import ModerationService
+from ..services.message_writer import MessageWriter
+from ..services.message_cache import RecentMessageCache
+from ..services.moderation_events import ModerationEvents
+from ..services.matching_queue import MatchingQueue
+from ..middleware.rate_limit import socket_rate_limited
+from .session_state import SocketIdentity
 
 
 @socketio.on('connect')
@@ -28,6 +34,9 @@ def handle_connect():
         if not user or not user.get('is_active', True):
             return False
 
+        # Cache identity for this connection so events skip MongoDB
+        SocketIdentity.store(user, decoded)
+
         # Join user to their personal room (for targeted events)
         join_room(user_id)
 
@@ -42,17 +51,47 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection."""
+    # Also once the token expired: offline sharers must not be matched
+    identity = SocketIdentity.connected_identity()
+    if identity and 'sharer' in identity['roles']:
+        MatchingQueue.dequeue_sid(identity['user_id'], request.sid)
+
+    SocketIdentity.forget()
     print("Client disconnected")
 
 
+@socketio.on('refresh_token')
+def handle_refresh_token(data):
+    """Re-authenticate the connection with a fresh access token."""
+    try:
+        decoded = decode_token(data.get('token'))
+
+        # A connection stays bound to the user it connected as (rooms, sid registry)
+        if decoded['sub'] != SocketIdentity.connected_user_id():
+            emit('error', {'message': 'Token does not belong to this connection'})
+            return
+
+        user = User.find_by_id(decoded['sub'])
+        if not user or not user.get('is_active', True):
+            emit('error', {'message': 'Account is inactive'})
+            return
+
+        SocketIdentity.store(user, decoded)
+        emit('token_refreshed', {'expires_at': decoded['exp']})
+
+    except Exception as e:
+        emit('error', {'message': 'Invalid or expired token'})
+
+
 @socketio.on('join_chat')
 def handle_join_chat(data):
     """User joins a chat room."""
     try:
-        # Get user from token (similar to connect)
-        auth = request.args.get('token')
-        decoded = decode_token(auth)
-        user_id = decoded['sub']
+        identity = SocketIdentity.current()
+        if not identity:
+            emit('error', {'message': 'Session expired, please refresh token'})
+            return
+        user_id = identity['user_id']
 
         session_id = data.get('session_id')
         if not session_id:
@@ -74,9 +113,8 @@ def handle_join_chat(data):
         join_room(room)
 
         # Notify other participant
-        user = User.find_by_id(user_id)
         emit('user_joined', {
-            'pseudonym': user['pseudonym']
+            'pseudonym': identity['pseudonym']
         }, room=room, skip_sid=request.sid)
 
         print(f"User {user_id} joined chat {session_id}")
@@ -86,14 +124,15 @@ def handle_join_chat(data):
 
 
 @socketio.on('send_message')
+@socket_rate_limited('messages')
 def handle_send_message(data):
     """Handle message sending."""
     try:
-        # Get user
-        auth = request.args.get('token')
-        decoded = decode_token(auth)
-        user_id = decoded['sub']
-        user = User.find_by_id(user_id)
+        identity = SocketIdentity.current()
+        if not identity:
+            emit('error', {'message': 'Session expired, please refresh token'})
+            return
+        user_id = identity['user_id']
 
         session_id = data.get('session_id')
         content = data.get('content')
@@ -134,21 +173,36 @@ def handle_send_message(data):
         # Determine sender role
         sender_role = 'sharer' if str(user_id) == str(session['sharer_id']) else 'listener'
 
-        # Save message
-        message = Message.create(
-            chat_session_id=session_id,
-            sender_id=user_id,
-            sender_role=sender_role,
-            content=content,
-            moderation_status=moderation_status
-        )
+        # Save message (write-behind: emit now, insert with the next batch)
+        if current_app.config['MESSAGE_WRITE_BEHIND']:
+            message = Message.build(
+                chat_session_id=session_id,
+                sender_id=user_id,
+                sender_role=sender_role,
+                content=content,
+                moderation_status=moderation_status
+            )
+            MessageWriter.submit(message)
+        else:
+            message = Message.create(
+                chat_session_id=session_id,
+                sender_id=user_id,
+                sender_role=sender_role,
+                content=content,
+                moderation_status=moderation_status
+            )
+        RecentMessageCache.append(message)
+
+        # Escalate flagged content to admins off the hot path
+        if moderation_status == 'flagged':
+            ModerationEvents.publish(message, moderation_result['reason'], identity['pseudonym'])
 
         # Emit to chat room
         room = f"chat_{session_id}"
         emit('new_message', {
             'message_id': str(message['_id']),
             'sender_id': str(user_id),
-            'sender_pseudonym': user['pseudonym'],
+            'sender_pseudonym': identity['pseudonym'],
             'content': content,
             'sent_at': message['sent_at'].isoformat(),
             'is_own_message': False  # Will be determined by client
@@ -162,11 +216,10 @@ def handle_send_message(data):
 def handle_typing(data):
     """Handle typing indicator."""
     try:
-        # Get user
-        auth = request.args.get('token')
-        decoded = decode_token(auth)
-        user_id = decoded['sub']
-        user = User.find_by_id(user_id)
+        identity = SocketIdentity.current()
+        if not identity:
+            return
+        user_id = identity['user_id']
 
         session_id = data.get('session_id')
         if not session_id:
@@ -184,7 +237,7 @@ def handle_typing(data):
         partner_id = str(session['listener_id']) if str(user_id) == str(session['sharer_id']) else str(session['sharer_id'])
 
         emit('user_typing', {
-            'pseudonym': user['pseudonym']
+            'pseudonym': identity['pseudonym']
         }, room=partner_id)
 
     except Exception as e:
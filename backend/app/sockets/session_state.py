@@ -0,0 +1,103 @@
+"""Authenticated identity kept in the Socket.IO session for each connection."""
+import threading
+import time
+from flask import request
+from flask_socketio import session
+from ..extensions import socketio, redis_client
+
+
+class SocketIdentity:
+    """Resolve a socket's identity once at connect time and reuse it per event.
+
+    The identity (user ID, pseudonym, roles) lives in the Socket.IO session
+    for the sid, so event handlers never hit MongoDB for identity. It is only
+    valid until the access token expires; the client then sends
+    'refresh_token' with a new token. Bans are published on a Redis channel
+    and every worker disconnects its local sockets for that user.
+    """
+
+    INVALIDATE_CHANNEL = 'socket_identity:invalidate'
+
+    # user ID -> sids connected to this worker
+    _local_sids = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def store(user, decoded_token):
+        """Save identity for the current sid after authenticating."""
+        user_id = str(user['_id'])
+        session['identity'] = {
+            'user_id': user_id,
+            'pseudonym': user['pseudonym'],
+            'roles': user.get('roles', []),
+            'languages': user.get('languages', []),
+            'is_admin': user.get('is_admin', False),
+            'expires_at': decoded_token['exp']
+        }
+
+        with SocketIdentity._lock:
+            SocketIdentity._local_sids.setdefault(user_id, set()).add(request.sid)
+
+    @staticmethod
+    def current():
+        """
+        Get identity for the current sid.
+
+        Returns:
+            identity dict, or None if not authenticated or the token expired
+        """
+        identity = session.get('identity')
+        if not identity or time.time() >= identity['expires_at']:
+            return None
+        return identity
+
+    @staticmethod
+    def connected_identity():
+        """Get the identity the current sid connected as, even if its token expired."""
+        return session.get('identity')
+
+    @staticmethod
+    def connected_user_id():
+        """Get the user ID the current sid connected as, even if its token expired."""
+        identity = SocketIdentity.connected_identity()
+        return identity['user_id'] if identity else None
+
+    @staticmethod
+    def forget():
+        """Drop the current sid from the local registry (on disconnect)."""
+        identity = session.get('identity')
+        if not identity:
+            return
+
+        with SocketIdentity._lock:
+            sids = SocketIdentity._local_sids.get(identity['user_id'])
+            if sids:
+                sids.discard(request.sid)
+                if not sids:
+                    del SocketIdentity._local_sids[identity['user_id']]
+
+    @staticmethod
+    def invalidate_user(user_id):
+        """Disconnect every socket of a user on all workers (e.g. after a ban)."""
+        redis_client.publish(SocketIdentity.INVALIDATE_CHANNEL, str(user_id))
+
+    @staticmethod
+    def _disconnect_local(user_id):
+        with SocketIdentity._lock:
+            sids = SocketIdentity._local_sids.pop(user_id, set())
+        for sid in sids:
+            socketio.server.disconnect(sid, namespace='/')
+
+    @staticmethod
+    def start_invalidation_listener(app):
+        """Listen for invalidations published by any worker."""
+        def listen():
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(SocketIdentity.INVALIDATE_CHANNEL)
+            for message in pubsub.listen():
+                try:
+                    SocketIdentity._disconnect_local(message['data'])
+                except Exception as e:
+                    app.logger.error(f'Socket invalidation failed: {str(e)}')
+
+        socketio.start_background_task(listen)
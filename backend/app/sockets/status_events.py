@@ -1,23 +1,22 @@
 """Socket.IO status event handlers."""
-from flask import request
-from flask_socketio import emit, join_room
-from flask_jwt_extended import decode_token
+from flask import current_app, request
+from flask_socketio import emit, join_room, leave_room
 from ..extensions import socketio
 from ..models.user import User
+from ..models.chat import ChatSession
+from ..services.matching_queue import MatchingQueue
+from ..services.moderation_events import ModerationEvents
+from .session_state import SocketIdentity
 
 
 @socketio.on('join_matching_queue')
 def handle_join_matching_queue():
     """Join the matching queue room to receive listener status updates."""
     try:
-        auth = request.args.get('token')
-        decoded = decode_token(auth)
-        user_id = decoded['sub']
-
-        # Verify user
-        user = User.find_by_id(user_id)
-        if not user:
+        identity = SocketIdentity.current()
+        if not identity:
             return
+        user_id = identity['user_id']
 
         # Join matching queue room
         join_room('matching_queue')
@@ -27,19 +26,79 @@ def handle_join_matching_queue():
         print(f"Error joining matching queue: {str(e)}")
 
 
+@socketio.on('join_admin_room')
+def handle_join_admin_room():
+    """Join the admin room to receive flagged-message alerts."""
+    identity = SocketIdentity.current()
+    if not identity or not identity['is_admin']:
+        emit('error', {'message': 'Admin access required'})
+        return
+
+    join_room(ModerationEvents.ADMIN_ROOM)
+    emit('admin_room_joined', {'room': ModerationEvents.ADMIN_ROOM})
+
+
+@socketio.on('enqueue_match')
+def handle_enqueue_match(data):
+    """Queue a sharer for server-side matching."""
+    try:
+        if not current_app.config['MATCH_QUEUE_ENABLED']:
+            emit('error', {'message': 'Matching queue is not enabled'})
+            return
+
+        # Verify user is a sharer
+        identity = SocketIdentity.current()
+        if not identity or 'sharer' not in identity['roles']:
+            emit('error', {'message': 'User is not a sharer'})
+            return
+        user_id = identity['user_id']
+
+        if ChatSession.find_active_by_user(user_id):
+            emit('error', {'message': 'You already have an active chat session'})
+            return
+
+        sharer = {
+            '_id': user_id,
+            'pseudonym': identity['pseudonym'],
+            'languages': identity['languages']
+        }
+        _, error = MatchingQueue.enqueue(sharer, data or {}, request.sid)
+        if error:
+            emit('error', {'message': error})
+            return
+        join_room('matching_queue')
+
+        emit('match_queued', {'queue_size': MatchingQueue.size()})
+
+    except Exception as e:
+        emit('error', {'message': str(e)})
+
+
+@socketio.on('leave_matching_queue')
+def handle_leave_matching_queue():
+    """Remove a sharer from the matching queue."""
+    try:
+        identity = SocketIdentity.current()
+        if not identity:
+            return
+
+        MatchingQueue.dequeue(identity['user_id'])
+        leave_room('matching_queue')
+
+    except Exception as e:
+        print(f"Error leaving matching queue: {str(e)}")
+
+
 @socketio.on('status_change')
 def handle_status_change(data):
     """Handle listener availability status change."""
     try:
-        auth = request.args.get('token')
-        decoded = decode_token(auth)
-        user_id = decoded['sub']
-
         # Verify user is a listener
-        user = User.find_by_id(user_id)
-        if not user or 'listener' not in user.get('roles', []):
+        identity = SocketIdentity.current()
+        if not identity or 'listener' not in identity['roles']:
             emit('error', {'message': 'User is not a listener'})
             return
+        user_id = identity['user_id']
 
         availability = data.get('availability')
         allowed_statuses = ['available', 'unavailable', 'in_chat']
@@ -48,6 +107,11 @@ def handle_status_change(data):
             emit('error', {'message': 'Invalid availability status'})
             return
 
+        # Reservation only checks availability, so a listener in a chat must not reopen it
+        if availability == 'available' and ChatSession.find_active_by_user(user_id):
+            emit('error', {'message': 'End your active chat session before becoming available'})
+            return
+
         # Update availability
         User.update_availability(user_id, availability)
 
@@ -1,12 +1,21 @@
 """Flask application factory."""
 import os
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 from .config import config_by_name
 from .extensions import jwt, cors, socketio, init_db
 
 
-def create_app(config_name=None):
-    """Create and configure Flask application."""
+def create_app(config_name=None, start_workers=False):
+    """
+    Create and configure Flask application.
+
+    Args:
+        config_name: Config to load (defaults to FLASK_ENV)
+        start_workers: Start the background workers (listeners, stream
+            consumer, write-behind flusher, queue assigner); only web
+            processes (run.py) do, scripts and one-off processes do not
+    """
     if config_name is None:
         config_name = os.getenv('FLASK_ENV', 'development')
 
@@ -26,9 +35,24 @@ def create_app(config_name=None):
         message_queue=app.config['SOCKETIO_MESSAGE_QUEUE']
     )
 
+    # Take the client address from X-Forwarded-For only for trusted proxy hops
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
     # Initialize database
     init_db(app)
 
+    # Select the message storage layout
+    from .models.message import Message
+    Message.configure_storage(app)
+
+    # Register JWT blocklist check
+    from .middleware.blocklist import TokenBlocklist
+
+    # Rate limit /api/v1 requests
+    from .middleware.rate_limit import RateLimiter
+    RateLimiter.init_app(app)
+
     # Register blueprints
     from .routes import auth, users, match, chat, feedback, reports, admin_routes
     app.register_blueprint(auth.bp, url_prefix='/api/v1/auth')
@@ -42,6 +66,9 @@ def create_app(config_name=None):
     # Register Socket.IO events
     from .sockets import chat_events, status_events
 
+    if start_workers:
+        _start_workers(app)
+
     # Health check endpoint
     @app.route('/health')
     def health_check():
@@ -53,3 +80,27 @@ def create_app(config_name=None):
     app.logger.info(f'Application started in {config_name} mode')
 
     return app
+
+
+def _start_workers(app):
+    """Start the background workers of a web process."""
+    from .middleware.blocklist import TokenBlocklist
+    from .sockets.session_state import SocketIdentity
+    SocketIdentity.start_invalidation_listener(app)
+    TokenBlocklist.start_sync(app)
+
+    if app.config['JWT_STATELESS_AUTH']:
+        from .services.revocation import RevocationFeed
+        RevocationFeed.start_listener(app)
+
+    if app.config['MODERATION_ESCALATION_ENABLED']:
+        from .services.moderation_events import ModerationEvents
+        ModerationEvents.start_consumer(app)
+
+    if app.config['MESSAGE_WRITE_BEHIND']:
+        from .services.message_writer import MessageWriter
+        MessageWriter.start_writer(app)
+
+    if app.config['MATCH_QUEUE_ENABLED']:
+        from .services.matching_queue import MatchingQueue
+        MatchingQueue.start_assigner(app)
@@ -30,10 +30,36 @@ class Config:
     JWT_ACCESS_COOKIE_NAME = 'access_token'
     JWT_REFRESH_COOKIE_NAME = 'refresh_token'
 
+    # Password hashing (bcrypt runs on eventlet's thread pool)
+    BCRYPT_MAX_PENDING = int(os.getenv('BCRYPT_MAX_PENDING', 32))
+
+    # Stateless auth: trust token claims + revocation mirror on opted-in routes
+    JWT_STATELESS_AUTH = os.getenv('JWT_STATELESS_AUTH', 'false').lower() == 'true'
+    REVOCATION_RESYNC_SECONDS = int(os.getenv('REVOCATION_RESYNC_SECONDS', 30))
+
+    # Token blocklist (bloom filter front for revoked tokens)
+    BLOCKLIST_BLOOM_CAPACITY = int(os.getenv('BLOCKLIST_BLOOM_CAPACITY', 100000))
+    BLOCKLIST_REBUILD_SECONDS = int(os.getenv('BLOCKLIST_REBUILD_SECONDS', 300))
+
+    # Number of reverse proxies in front of the app that set X-Forwarded-For
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', 0))
+
+    # Rate limiting: rule -> (requests, window seconds)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMITS = {
+        'auth': (int(os.getenv('RATE_LIMIT_AUTH_PER_MINUTE', 5)), 60),
+        'messages': (int(os.getenv('RATE_LIMIT_MESSAGES_PER_MINUTE', 30)), 60),
+        'api': (int(os.getenv('RATE_LIMIT_API_PER_MINUTE', 100)), 60)
+    }
+
     # Google OAuth
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID', '')
     GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET', '')
     GOOGLE_REDIRECT_URI = os.getenv('GOOGLE_REDIRECT_URI', 'http://localhost:5000/api/v1/auth/google/callback')
+    GOOGLE_USERINFO_URL = os.getenv('GOOGLE_USERINFO_URL', 'https://www.googleapis.com/oauth2/v3/userinfo')
+    GOOGLE_HTTP_POOL_SIZE = int(os.getenv('GOOGLE_HTTP_POOL_SIZE', 10))
+    GOOGLE_HTTP_TIMEOUT_SECONDS = float(os.getenv('GOOGLE_HTTP_TIMEOUT_SECONDS', 5))
+    GOOGLE_USERINFO_CACHE_SECONDS = int(os.getenv('GOOGLE_USERINFO_CACHE_SECONDS', 60))
 
     # File Upload
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads/avatars')
@@ -45,6 +71,29 @@ class Config:
 
     # Moderation
     MODERATION_ENABLED = os.getenv('MODERATION_ENABLED', 'true').lower() == 'true'
+    MODERATION_ESCALATION_ENABLED = os.getenv('MODERATION_ESCALATION_ENABLED', 'true').lower() == 'true'
+
+    # Write-behind message persistence
+    MESSAGE_WRITE_BEHIND = os.getenv('MESSAGE_WRITE_BEHIND', 'false').lower() == 'true'
+    MESSAGE_FLUSH_INTERVAL_MS = int(os.getenv('MESSAGE_FLUSH_INTERVAL_MS', 100))
+    MESSAGE_FLUSH_BATCH_SIZE = int(os.getenv('MESSAGE_FLUSH_BATCH_SIZE', 200))
+    MESSAGE_BUFFER_LIMIT = int(os.getenv('MESSAGE_BUFFER_LIMIT', 10000))
+    MESSAGE_JOURNAL_ENABLED = os.getenv('MESSAGE_JOURNAL_ENABLED', 'true').lower() == 'true'
+
+    # Message storage layout: 'documents' (one per message) or 'buckets'
+    MESSAGE_STORAGE_MODE = os.getenv('MESSAGE_STORAGE_MODE', 'documents')
+    MESSAGE_BUCKET_SIZE = int(os.getenv('MESSAGE_BUCKET_SIZE', 100))
+    # A bucket only takes messages sent within this long of its first one
+    MESSAGE_BUCKET_WINDOW_SECONDS = int(os.getenv('MESSAGE_BUCKET_WINDOW_SECONDS', 600))
+
+    # Matching queue
+    MATCH_QUEUE_ENABLED = os.getenv('MATCH_QUEUE_ENABLED', 'false').lower() == 'true'
+    MATCH_QUEUE_INTERVAL_MS = int(os.getenv('MATCH_QUEUE_INTERVAL_MS', 300))
+    MATCH_QUEUE_ENTRY_TTL_SECONDS = int(os.getenv('MATCH_QUEUE_ENTRY_TTL_SECONDS', 600))
+
+    # Matching worker processes (0 = match inside the web process)
+    MATCH_WORKER_PARTITIONS = int(os.getenv('MATCH_WORKER_PARTITIONS', 0))
+    MATCH_WORKER_TIMEOUT_SECONDS = int(os.getenv('MATCH_WORKER_TIMEOUT_SECONDS', 2))
 
     # Socket.IO
     SOCKETIO_MESSAGE_QUEUE = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
@@ -65,6 +114,7 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
+    RATE_LIMIT_ENABLED = False
     MONGODB_URI = 'mongodb://localhost:27017/empathy_platform_test'
 
 
@@ -3,6 +3,7 @@ from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_socketio import SocketIO
 from pymongo import MongoClient
+from pymongo.errors import OperationFailure
 from redis import Redis
 
 # Initialize extensions (will be configured in app factory)
@@ -54,10 +55,33 @@ def _create_indexes(db):
     db.chat_sessions.create_index('status')
     db.chat_sessions.create_index('expires_at', expireAfterSeconds=0)  # TTL index
 
-    # Messages collection
-    db.messages.create_index('chat_session_id')
+    # Messages collection (history pages walk chat_session_id, then _id)
+    # Build the compound index before dropping its prefix so session queries stay indexed
+    db.messages.create_index([('chat_session_id', 1), ('_id', -1)])
+    if 'chat_session_id_1' in db.messages.index_information():
+        try:
+            db.messages.drop_index('chat_session_id_1')  # Prefix of the compound index
+        except OperationFailure as e:
+            # IndexNotFound: another worker starting up dropped it first
+            if e.code != 27:
+                raise
+    # Review queue: only flagged messages are indexed (queries must include is_flagged: True)
+    db.messages.create_index(
+        [('moderation_status', 1), ('_id', -1)],
+        partialFilterExpression={'is_flagged': True},
+        name='flagged_queue'
+    )
     db.messages.create_index('expires_at', expireAfterSeconds=0)  # TTL index
 
+    # Message buckets collection (bucketed storage mode)
+    db.message_buckets.create_index([('chat_session_id', 1), ('last_id', -1)])
+    db.message_buckets.create_index([('last_id', 1), ('first_id', 1)])
+    db.message_buckets.create_index('expires_at', expireAfterSeconds=0)  # TTL index
+
+    # Moderation events collection (flagged-message escalations)
+    db.moderation_events.create_index([('status', 1), ('flagged_at', -1)])
+    db.moderation_events.create_index('message_id')
+
     # Feedback collection
     db.feedback.create_index('reviewee_id')
     db.feedback.create_index('chat_session_id')
@@ -1,8 +1,11 @@
 """Application entry point."""
+import eventlet
+eventlet.monkey_patch()  # Blocking Redis/Mongo calls must yield to other green threads
+
 import os
 from app import create_app, socketio
 
-app = create_app()
+app = create_app(start_workers=True)
 
 if __name__ == '__main__':
     # Use socketio.run instead of app.run for Socket.IO support
@@ -0,0 +1,262 @@
+"""
+Benchmark MatchingService.find_matches against synthetic listener populations
+Run with: python scripts/benchmark_matching.py [--sizes 1000 10000 100000] [--output results.json]
+
+By default the listener population is served from memory (in-process
+stand-in for MongoDB/Redis) so only matching itself is measured. Use
+--mongo-uri to load the population into a scratch MongoDB database and
+benchmark the full path (availability index, candidate cache, queries).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+LANGUAGES = [('English', 0.70), ('Spanish', 0.15), ('French', 0.05), ('Hindi', 0.05), ('Mandarin', 0.05)]
+TOPICS = [
+    'anxiety', 'stress', 'depression', 'loneliness', 'relationships', 'grief',
+    'work', 'family', 'isolation', 'self-esteem', 'sleep', 'school'
+]
+INTERESTS = ['mental health', 'empathy', 'music', 'reading', 'support', 'mindfulness', 'sports']
+
+# Preference mixes sharers send to /match/find-listeners
+PREFERENCE_MIXES = {
+    'none': lambda rng: {},
+    'language': lambda rng: {'language': _weighted(rng, LANGUAGES)},
+    'topic_language': lambda rng: {
+        'topic': _topic(rng),
+        'language': _weighted(rng, LANGUAGES)
+    },
+    'min_rating': lambda rng: {
+        'topic': _topic(rng),
+        'preferred_min_rating': rng.choice([3.0, 4.0, 4.5])
+    },
+}
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def _topic(rng):
+    # Zipf-like popularity: the first topics are requested far more often
+    weights = [1.0 / (rank + 1) for rank in range(len(TOPICS))]
+    return rng.choices(TOPICS, weights=weights)[0]
+
+
+def generate_listeners(count, rng):
+    """Generate available listener documents with realistic distributions."""
+    from bson import ObjectId
+    from app.services.batch_scorer import BatchScorer
+
+    listeners = []
+    for i in range(count):
+        languages = [_weighted(rng, LANGUAGES)]
+        if rng.random() < 0.2:
+            second = _weighted(rng, LANGUAGES)
+            if second not in languages:
+                languages.append(second)
+
+        # 15% of listeners have no ratings yet
+        rating = 0.0 if rng.random() < 0.15 else round(min(max(rng.gauss(4.3, 0.5), 1.0), 5.0), 2)
+
+        listener = {
+            '_id': ObjectId(),
+            'email': f'bench-listener-{i}@example.com',
+            'pseudonym': f'BenchListener{i}',
+            'roles': ['listener'],
+            'bio': 'Synthetic benchmark listener',
+            'profile_picture_url': None,
+            'languages': languages,
+            'listener_topics': rng.sample(TOPICS, rng.randint(1, 4)),
+            'interests': rng.sample(INTERESTS, rng.randint(0, 3)),
+            'listener_rating': rating,
+            'listener_total_chats': int(rng.lognormvariate(2.5, 1.2)),
+            'listener_availability': 'available',
+            'is_active': True,
+            'created_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow()
+        }
+        listener['match_static'] = BatchScorer.static_components(listener)
+        listeners.append(listener)
+
+    return listeners
+
+
+def _percentile(samples, percentile):
+    ordered = sorted(samples)
+    index = min(int(round(percentile / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class _UnusedCollection:
+    """Placeholder collection: fails loudly if the in-process benchmark queries it."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        raise RuntimeError(f'{self.name}.{attr} is not available in in-process mode')
+
+
+class _UnusedDatabase:
+    """Stand-in for app.extensions.db so models can bind their collections without MongoDB."""
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _UnusedCollection(name)
+
+
+def use_in_process_population(listeners):
+    """Serve find_matches from an in-memory population instead of MongoDB/Redis."""
+    from app import extensions
+
+    # Models bind db.<collection> at import time; every lookup they would
+    # make is replaced below
+    if extensions.db is None:
+        extensions.db = _UnusedDatabase()
+
+    from app.models.user import User
+    from app.models.chat import ChatSession
+    from app.services.match_cache import MatchCache
+
+    def find_available_listeners(filters=None):
+        filters = filters or {}
+        language = filters.get('language')
+        min_rating = filters.get('min_rating')
+        return [
+            listener for listener in listeners
+            if (not language or language in listener['languages'])
+            and (min_rating is None or listener['listener_rating'] >= min_rating)
+        ]
+
+    User.find_available_listeners = staticmethod(find_available_listeners)
+    ChatSession.get_recent_partners = staticmethod(lambda user_id, hours=24: set())
+    MatchCache.get = staticmethod(lambda filters: None)
+    MatchCache.put = staticmethod(lambda filters, candidates: None)
+
+
+def load_mongo_population(listeners):
+    """Replace listeners in the scratch database with the synthetic population."""
+    from app.models.user import User
+    from app.services.listener_index import ListenerIndex
+
+    User.collection.delete_many({'email': {'$regex': '^bench-listener-'}})
+    for start in range(0, len(listeners), 5000):
+        User.collection.insert_many(listeners[start:start + 5000], ordered=False)
+    ListenerIndex.rebuild(User.collection)
+
+
+def run_mix(sharer_id, mix, iterations, rng):
+    """Time find_matches for one preference mix."""
+    import numpy as np
+    from app.services.matching_service import MatchingService
+
+    score_rng = np.random.default_rng(rng.randint(0, 2 ** 32 - 1))
+    preferences = [PREFERENCE_MIXES[mix](rng) for _ in range(iterations)]
+
+    # Warm up caches/imports outside the measurement
+    MatchingService.find_matches(sharer_id, preferences[0], rng=score_rng)
+
+    latencies = []
+    for prefs in preferences:
+        started = time.perf_counter()
+        MatchingService.find_matches(sharer_id, prefs, rng=score_rng)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    for prefs in preferences[:5]:
+        MatchingService.find_matches(sharer_id, prefs, rng=score_rng)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'mix': mix,
+        'iterations': iterations,
+        'p50_ms': round(_percentile(latencies, 50), 3),
+        'p99_ms': round(_percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'peak_memory_kb': round(peak / 1024, 1)
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def run_benchmark():
+    """Benchmark find_matches across population sizes and preference mixes."""
+    parser = argparse.ArgumentParser(description='Benchmark listener matching')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--mixes', nargs='+', default=list(PREFERENCE_MIXES), choices=list(PREFERENCE_MIXES))
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--mongo-uri', help='Scratch MongoDB database to benchmark against (full path)')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    if args.mongo_uri:
+        os.environ['MONGODB_URI'] = args.mongo_uri
+
+    from app import create_app
+    from bson import ObjectId
+
+    app = create_app('development') if args.mongo_uri else None
+    rng = random.Random(args.seed)
+    sharer_id = ObjectId()
+    results = []
+
+    for size in args.sizes:
+        listeners = generate_listeners(size, rng)
+
+        if app:
+            with app.app_context():
+                load_mongo_population(listeners)
+                for mix in args.mixes:
+                    results.append({'size': size, **run_mix(sharer_id, mix, args.iterations, rng)})
+        else:
+            use_in_process_population(listeners)
+            for mix in args.mixes:
+                results.append({'size': size, **run_mix(sharer_id, mix, args.iterations, rng)})
+
+        print(f"Benchmarked {size} listeners", file=sys.stderr)
+
+    report = {
+        'benchmark': 'find_matches',
+        'revision': _git_revision(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'mode': 'mongo' if args.mongo_uri else 'in_process',
+        'seed': args.seed,
+        'results': results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,155 @@
+"""
+Compare message write throughput and index size: one document per message vs buckets
+Run with: python scripts/benchmark_message_storage.py --mongo-uri mongodb://localhost:27017/bench [--messages 100000]
+
+Writes the same synthetic chat traffic into scratch collections in both
+layouts (with the production indexes, including the TTL index) and reports
+messages/second, documents, storage size and total index size. Batch size
+1 matches inline writes; larger batches match write-behind flushes.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+
+def generate_messages(count, sessions, rng):
+    """Generate interleaved chat messages across concurrent sessions."""
+    from bson import ObjectId
+
+    session_ids = [ObjectId() for _ in range(sessions)]
+    participants = {session_id: (ObjectId(), ObjectId()) for session_id in session_ids}
+    words = ['I', 'feel', 'really', 'tired', 'today', 'thanks', 'for', 'listening', 'that', 'sounds', 'hard']
+
+    messages = []
+    for _ in range(count):
+        session_id = rng.choice(session_ids)
+        role = rng.choice(['sharer', 'listener'])
+        sent_at = datetime.utcnow()
+        messages.append({
+            '_id': ObjectId(),
+            'chat_session_id': session_id,
+            'sender_id': participants[session_id][0 if role == 'sharer' else 1],
+            'sender_role': role,
+            'content': ' '.join(rng.choice(words) for _ in range(rng.randint(3, 30))),
+            'sent_at': sent_at,
+            'expires_at': sent_at + timedelta(hours=24),
+            'is_flagged': False,
+            'moderation_status': 'approved',
+            'flagged_reason': None
+        })
+    return messages
+
+
+def _collection_stats(db, name):
+    stats = db.command('collStats', name)
+    return {
+        'documents': stats['count'],
+        'storage_kb': round(stats['storageSize'] / 1024, 1),
+        'index_kb': round(stats['totalIndexSize'] / 1024, 1),
+        'indexes': stats['nindexes']
+    }
+
+
+def bench_documents(db, messages, batch):
+    """Write messages one document each (current layout)."""
+    collection = db.bench_messages
+    collection.drop()
+    collection.create_index([('chat_session_id', 1), ('_id', -1)])
+    collection.create_index('expires_at', expireAfterSeconds=0)
+
+    started = time.perf_counter()
+    for start in range(0, len(messages), batch):
+        chunk = [dict(doc) for doc in messages[start:start + batch]]
+        if batch == 1:
+            collection.insert_one(chunk[0])
+        else:
+            collection.insert_many(chunk, ordered=False)
+    elapsed = time.perf_counter() - started
+
+    stats = _collection_stats(db, 'bench_messages')
+    collection.drop()
+    return {'layout': 'documents', 'messages_per_second': round(len(messages) / elapsed), **stats}
+
+
+def bench_buckets(db, messages, batch, bucket_size):
+    """Write messages into per-session buckets (bucketed layout)."""
+    from app.models.message import Message
+
+    collection = db.bench_message_buckets
+    collection.drop()
+    collection.create_index([('chat_session_id', 1), ('last_id', -1)])
+    collection.create_index([('last_id', 1), ('first_id', 1)])
+    collection.create_index('expires_at', expireAfterSeconds=0)
+
+    started = time.perf_counter()
+    for start in range(0, len(messages), batch):
+        operations = Message.bucket_operations(messages[start:start + batch], bucket_size)
+        collection.bulk_write(operations, ordered=True)
+    elapsed = time.perf_counter() - started
+
+    stats = _collection_stats(db, 'bench_message_buckets')
+    collection.drop()
+    return {
+        'layout': 'buckets',
+        'bucket_size': bucket_size,
+        'messages_per_second': round(len(messages) / elapsed),
+        **stats
+    }
+
+
+def run_benchmark():
+    """Benchmark both message layouts."""
+    parser = argparse.ArgumentParser(description='Benchmark message storage layouts')
+    parser.add_argument('--mongo-uri', required=True, help='Scratch MongoDB database (full path)')
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--sessions', type=int, default=500, help='Concurrent chat sessions')
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 200])
+    parser.add_argument('--bucket-sizes', type=int, nargs='+', default=[50, 100, 200])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    os.environ['MONGODB_URI'] = args.mongo_uri
+
+    from app import create_app
+
+    app = create_app('development')
+    rng = random.Random(args.seed)
+    messages = generate_messages(args.messages, args.sessions, rng)
+    results = []
+
+    with app.app_context():
+        from app.extensions import db  # Bound once create_app has connected
+        for batch in args.batches:
+            results.append({'batch': batch, **bench_documents(db, messages, batch)})
+            for bucket_size in args.bucket_sizes:
+                results.append({'batch': batch, **bench_buckets(db, messages, batch, bucket_size)})
+            print(f"Benchmarked batch size {batch}", file=sys.stderr)
+
+    report = {
+        'benchmark': 'message_storage',
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'messages': args.messages,
+        'sessions': args.sessions,
+        'seed': args.seed,
+        'results': results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,119 @@
+"""
+Benchmark moderation throughput (normalization + rules) against a per-KB budget
+Run with: python scripts/benchmark_moderation.py [--budget-us-per-kb 200] [--output results.json]
+
+Moderates synthetic chat lines (plain ASCII, Unicode-heavy and obfuscated)
+at several lengths and reports microseconds per message and per KB of
+text. The budget is a fixed per-message allowance (call overhead dominates
+short lines) plus a per-KB cost; exits with status 1 if any case exceeds
+it, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+WORDS = [
+    'I', 'feel', 'really', 'tired', 'today', 'thanks', 'for', 'listening', 'that', 'sounds',
+    'hard', 'work', 'has', 'been', 'stressful', 'and', 'my', 'family', 'does', 'not', 'get', 'it'
+]
+
+# Character mixes applied to the synthetic words
+TEXT_MIXES = {
+    'ascii': lambda rng, word: word,
+    'unicode': lambda rng, word: rng.choice([word, word.upper(), f'{word}’s', f'«{word}»', word + ' 😊']),
+    'obfuscated': lambda rng, word: rng.choice([
+        word,
+        ' '.join(word),
+        word.replace('e', '3').replace('a', '4'),
+        word.replace('o', '\u043e'),  # Cyrillic o
+        '\u200b'.join(word)      # Zero-width spaces
+    ]),
+}
+
+
+def generate_text(length, mix, rng):
+    """Generate one message of roughly `length` characters."""
+    parts = []
+    size = 0
+    while size < length:
+        word = TEXT_MIXES[mix](rng, rng.choice(WORDS))
+        parts.append(word)
+        size += len(word) + 1
+    return ' '.join(parts)[:length]
+
+
+def run_case(length, mix, iterations, rng):
+    """Time moderate_message for one text length and character mix."""
+    from app.services.moderation_service import ModerationService
+
+    texts = [generate_text(length, mix, rng) for _ in range(iterations)]
+    kilobytes = sum(len(text.encode('utf-8')) for text in texts) / 1024.0
+
+    started = time.perf_counter()
+    for text in texts:
+        ModerationService.moderate_message(text)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'length': length,
+        'mix': mix,
+        'iterations': iterations,
+        'kb_per_message': round(kilobytes / iterations, 3),
+        'us_per_message': round(elapsed / iterations * 1e6, 2),
+        'us_per_kb': round(elapsed / kilobytes * 1e6, 2)
+    }
+
+
+def run_benchmark():
+    """Benchmark moderation across text lengths and mixes."""
+    parser = argparse.ArgumentParser(description='Benchmark message moderation')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[50, 500, 2000])
+    parser.add_argument('--mixes', nargs='+', default=list(TEXT_MIXES), choices=list(TEXT_MIXES))
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--budget-us-per-kb', type=float, default=200.0)
+    parser.add_argument('--budget-us-per-message', type=float, default=25.0, help='Fixed allowance per message')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = []
+    for length in args.lengths:
+        for mix in args.mixes:
+            result = run_case(length, mix, args.iterations, rng)
+            budget = args.budget_us_per_message + args.budget_us_per_kb * result['kb_per_message']
+            result['budget_us'] = round(budget, 2)
+            result['within_budget'] = result['us_per_message'] <= budget
+            results.append(result)
+
+    report = {
+        'benchmark': 'moderate_message',
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'budget_us_per_kb': args.budget_us_per_kb,
+        'budget_us_per_message': args.budget_us_per_message,
+        'seed': args.seed,
+        'results': results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if not all(result['within_budget'] for result in results):
+        print('Moderation exceeded the per-KB budget', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    run_benchmark()
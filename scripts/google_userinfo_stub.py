@@ -0,0 +1,59 @@
+"""
+Local stand-in for Google's userinfo endpoint (load tests / offline benchmarks)
+Run with: python scripts/google_userinfo_stub.py [--port 8085] [--latency-ms 50]
+
+Point the backend at it with GOOGLE_USERINFO_URL=http://localhost:8085/userinfo.
+Any bearer token of the form "stub-<id>" is accepted and maps to a stable
+fake Google account; anything else gets 401.
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class UserInfoHandler(BaseHTTPRequestHandler):
+    """Serve /userinfo like Google's OAuth2 v3 endpoint."""
+
+    latency = 0.0
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real endpoint
+
+    def do_GET(self):
+        time.sleep(self.latency)
+
+        token = (self.headers.get('Authorization') or '').replace('Bearer ', '')
+        if self.path.split('?')[0] != '/userinfo' or not token.startswith('stub-'):
+            self._send(401, {'error': 'invalid_token'})
+            return
+
+        account_id = token[len('stub-'):]
+        self._send(200, {
+            'sub': f'stub{account_id}',
+            'email': f'stub-{account_id}@example.com',
+            'email_verified': True,
+            'name': f'Stub User {account_id}',
+            'picture': None
+        })
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Quiet under load
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stub Google userinfo endpoint')
+    parser.add_argument('--port', type=int, default=8085)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated provider latency')
+    args = parser.parse_args()
+
+    UserInfoHandler.latency = args.latency_ms / 1000.0
+    server = ThreadingHTTPServer(('0.0.0.0', args.port), UserInfoHandler)
+    print(f"Stub userinfo endpoint on http://localhost:{args.port}/userinfo")
+    server.serve_forever()
@@ -0,0 +1,59 @@
+"""
+Move per-message documents into bucket documents
+Run with: MESSAGE_STORAGE_MODE=buckets python scripts/migrate_message_buckets.py [--dry-run]
+
+Run it only once MESSAGE_STORAGE_MODE=buckets is live: bucket mode reads
+both collections, so sessions stay readable while they are migrated.
+Flagged messages are left as individual documents. Each session is
+migrated by inserting its buckets and then deleting the moved documents;
+if interrupted in between, the duplicates are dropped on read and the
+documents are picked up again by the next run.
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from app import create_app
+
+
+def migrate(bucket_size, dry_run=False):
+    """Migrate every session's unflagged messages into buckets."""
+    from app.models.message import Message
+
+    unflagged = {'is_flagged': {'$ne': True}}
+    session_ids = Message.collection.distinct('chat_session_id', unflagged)
+    print(f"Migrating {len(session_ids)} session(s) into buckets of {bucket_size}...")
+
+    moved = 0
+    buckets_created = 0
+    for session_id in session_ids:
+        docs = list(Message.collection.find({'chat_session_id': session_id, **unflagged}).sort('_id', 1))
+        if not docs:
+            continue
+
+        buckets = Message.to_buckets(session_id, docs, bucket_size)
+        if not dry_run:
+            Message.bucket_collection.insert_many(buckets)
+            Message.collection.delete_many({'_id': {'$in': [doc['_id'] for doc in docs]}})
+
+        moved += len(docs)
+        buckets_created += len(buckets)
+
+    action = 'Would move' if dry_run else 'Moved'
+    print(f"{action} {moved} message(s) into {buckets_created} bucket(s)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migrate messages into bucket documents')
+    parser.add_argument('--dry-run', action='store_true', help='Count what would be migrated')
+    parser.add_argument('--force', action='store_true', help='Migrate even if bucket mode is off')
+    args = parser.parse_args()
+
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        if app.config['MESSAGE_STORAGE_MODE'] != 'buckets' and not args.force and not args.dry_run:
+            print("MESSAGE_STORAGE_MODE is not 'buckets'; migrated messages would not be readable. Use --force to override.")
+            sys.exit(1)
+
+        migrate(app.config['MESSAGE_BUCKET_SIZE'], dry_run=args.dry_run)
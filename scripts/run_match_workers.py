@@ -0,0 +1,53 @@
+"""
+Run language-partitioned matching worker processes
+Run with: python scripts/run_match_workers.py [--partitions 4]
+
+The web tier dispatches /match/find-listeners to these workers when
+MATCH_WORKER_PARTITIONS is set; use the same partition count here.
+
+Services and models bind the database and Redis clients when imported, so
+each worker process imports them only after create_app(); worker processes
+are spawned and re-import this script, so nothing else is imported at the top.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from app import create_app
+
+
+def _worker_main(partition, config_name):
+    """Process entry point: build an app for this process and serve a partition."""
+    app = create_app(config_name)
+    from app.services.matching_workers import MatchingWorkers
+    MatchingWorkers.run_worker(app, partition)
+
+
+def serve(partitions, config_name=None):
+    """Start one worker process per partition and wait for them."""
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=_worker_main, args=(partition, config_name), daemon=True)
+        for partition in range(partitions)
+    ]
+
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run matching worker processes')
+    parser.add_argument(
+        '--partitions',
+        type=int,
+        default=int(os.getenv('MATCH_WORKER_PARTITIONS') or os.cpu_count() or 1)
+    )
+    parser.add_argument('--config', default=os.getenv('FLASK_ENV', 'development'))
+    args = parser.parse_args()
+
+    print(f"Starting {args.partitions} matching worker(s)...")
+    serve(args.partitions, args.config)
@@ -0,0 +1,28 @@
+"""
+Run the moderation rescan worker
+Run with: python scripts/run_moderation_rescan.py [--processes 4]
+
+Waits for rescan jobs queued from POST /api/v1/admin/moderation/rescan and
+re-moderates live messages with a pool of worker processes. Models are
+imported only after create_app() has initialized the database; pool
+processes re-import this script, so nothing else may be imported at the top.
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from app import create_app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the moderation rescan worker')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--config', default=os.getenv('FLASK_ENV', 'development'))
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    from app.services.moderation_rescan import ModerationRescan
+
+    print(f"Starting moderation rescan worker with {args.processes} process(es)...")
+    ModerationRescan.serve(app, args.processes)